@@ -7,5 +7,8 @@ from app.models.user import User
 from app.models.church import Church
 from app.models.denomination import Denomination
 from app.models.role import Role
-from app.models.enums import Gender, EventStatus, RegistrationStatus, UserRole
+from app.models.enums import Gender, EventStatus, RegistrationStatus, UserRole, ScheduleJobStatus
 from app.models.event_waitlist import EventWaitlist
+from app.models.schedule_job import ScheduleJob
+from app.models.event_schedule_snapshot import EventScheduleSnapshot
+from app.models.event_schedule_trace import EventScheduleTrace
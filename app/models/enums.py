@@ -20,6 +20,13 @@ class RegistrationStatus(Enum):
     WAITLISTED = "Waitlisted"
 
 
+class ScheduleJobStatus(Enum):
+    PENDING = "Pending"
+    RUNNING = "Running"
+    SUCCEEDED = "Succeeded"
+    FAILED = "Failed"
+
+
 class UserRole(Enum):
     USER = 1
     ORGANIZER = 2
@@ -20,6 +20,10 @@ class Event(db.Model):
     registration_deadline = db.Column(db.TIMESTAMP(timezone=True), nullable=False)
     num_rounds = db.Column(db.Integer, nullable=True)
     num_tables = db.Column(db.Integer, nullable=True)
+    # MatchingRules.to_dict(); NULL means the default rules
+    matching_rules = db.Column(db.JSON, nullable=True)
+    # record ScheduleTrace decisions when generating this event's schedule
+    trace_schedules = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     created_at = db.Column(
         db.TIMESTAMP(timezone=True), nullable=False, server_default=db.func.now()
     )
@@ -30,18 +34,22 @@ class Event(db.Model):
         onupdate=db.func.now(),
     )
 
-    def to_dict(self):
+    # Registrations that count towards registered_attendee_count
+    REGISTERED_STATUSES = (RegistrationStatus.REGISTERED, RegistrationStatus.CHECKED_IN)
+
+    def to_dict(self, registered_attendee_count=None):
+        """
+        registered_attendee_count can be passed in by callers that serialize
+        many events and counted them all at once; otherwise it is queried.
+        """
         from .event_attendee import EventAttendee
 
-        registered_attendee_count = (
-            EventAttendee.query.filter(EventAttendee.event_id == self.id)
-            .filter(
-                EventAttendee.status.in_(
-                    [RegistrationStatus.REGISTERED, RegistrationStatus.CHECKED_IN]
-                )
+        if registered_attendee_count is None:
+            registered_attendee_count = (
+                EventAttendee.query.filter(EventAttendee.event_id == self.id)
+                .filter(EventAttendee.status.in_(Event.REGISTERED_STATUSES))
+                .count()
             )
-            .count()
-        )
         return {
             "id": self.id,
             "name": self.name,
@@ -62,4 +70,5 @@ class Event(db.Model):
             "registered_attendee_count": registered_attendee_count,
             "num_rounds": self.num_rounds,
             "num_tables": self.num_tables,
+            "matching_rules": self.matching_rules,
         }
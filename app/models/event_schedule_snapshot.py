@@ -0,0 +1,21 @@
+from app.extensions import db
+
+
+class EventScheduleSnapshot(db.Model):
+    """
+    One attendee's schedule for an event, pre-serialized as the JSON list
+    that GET /events/<id>/schedule returns, so reads are a primary-key
+    lookup instead of rebuilding it from the speed dates.
+    """
+
+    __tablename__ = "event_schedule_snapshots"
+
+    event_id = db.Column(db.Integer, db.ForeignKey("events.id"), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    schedule = db.Column(db.Text, nullable=False)
+    updated_at = db.Column(
+        db.TIMESTAMP(timezone=True),
+        nullable=False,
+        server_default=db.func.now(),
+        onupdate=db.func.now(),
+    )
@@ -0,0 +1,17 @@
+from app.extensions import db
+
+
+class EventScheduleTrace(db.Model):
+    """
+    Decisions recorded by the latest traced schedule run of an event, as the
+    list of ScheduleTrace tuples. Kept in the database rather than in the
+    process that ran the schedule, so any worker can serve it.
+    """
+
+    __tablename__ = "event_schedule_traces"
+
+    event_id = db.Column(db.Integer, db.ForeignKey("events.id"), primary_key=True)
+    decisions = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(
+        db.TIMESTAMP(timezone=True), nullable=False, server_default=db.func.now()
+    )
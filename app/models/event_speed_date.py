@@ -3,6 +3,13 @@ from app.extensions import db
 
 class EventSpeedDate(db.Model):
     __tablename__ = "events_speed_dates"
+    __table_args__ = (
+        # Pair-history lookups across events (EventSpeedDateRepository.find_past_pairs)
+        db.Index("ix_events_speed_dates_male_female", "male_id", "female_id"),
+        # An attendee's seat in given rounds (EventSpeedDateRepository.find_rounds_for_user)
+        db.Index("ix_events_speed_dates_event_male_round", "event_id", "male_id", "round_number"),
+        db.Index("ix_events_speed_dates_event_female_round", "event_id", "female_id", "round_number"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey("events.id"), nullable=False)
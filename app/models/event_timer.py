@@ -5,7 +5,7 @@ class EventTimer(db.Model):
     __tablename__ = "event_timers"
 
     id = db.Column(db.Integer, primary_key=True)
-    event_id = db.Column(db.Integer, db.ForeignKey("events.id"), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey("events.id"), nullable=False, index=True)
     current_round = db.Column(db.Integer, nullable=False, default=1)
     final_round = db.Column(db.Integer, nullable=False, default=1)
     round_duration = db.Column(
@@ -0,0 +1,58 @@
+from datetime import datetime, timezone
+from app.extensions import db
+
+
+class ScheduleJob(db.Model):
+    __tablename__ = "schedule_jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(
+        db.Integer, db.ForeignKey("events.id"), nullable=False, index=True
+    )
+    status = db.Column(db.String(20), nullable=False)
+    num_tables_requested = db.Column(db.Integer, nullable=False)
+    num_rounds_requested = db.Column(db.Integer, nullable=False)
+    rounds_filled = db.Column(db.Integer, nullable=False, default=0)
+    num_rounds = db.Column(db.Integer, nullable=True)
+    num_tables = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    started_at = db.Column(db.TIMESTAMP(timezone=True), nullable=True)
+    finished_at = db.Column(db.TIMESTAMP(timezone=True), nullable=True)
+    created_at = db.Column(
+        db.TIMESTAMP(timezone=True), nullable=False, server_default=db.func.now()
+    )
+    updated_at = db.Column(
+        db.TIMESTAMP(timezone=True),
+        nullable=False,
+        server_default=db.func.now(),
+        onupdate=db.func.now(),
+    )
+
+    def elapsed_seconds(self):
+        if not self.started_at:
+            return 0
+        started_at = (
+            self.started_at.replace(tzinfo=timezone.utc)
+            if self.started_at.tzinfo is None
+            else self.started_at
+        )
+        finished_at = self.finished_at or datetime.now(timezone.utc)
+        if finished_at.tzinfo is None:
+            finished_at = finished_at.replace(tzinfo=timezone.utc)
+        return round((finished_at - started_at).total_seconds(), 3)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "event_id": self.event_id,
+            "status": self.status,
+            "num_tables_requested": self.num_tables_requested,
+            "num_rounds_requested": self.num_rounds_requested,
+            "rounds_filled": self.rounds_filled,
+            "elapsed_seconds": self.elapsed_seconds(),
+            "num_rounds": self.num_rounds,
+            "num_tables": self.num_tables,
+            "error": self.error,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -2,3 +2,6 @@ from .user_repository import UserRepository
 from .event_repository import EventRepository
 from .event_attendee_repository import EventAttendeeRepository
 from .event_waitlist_repository import EventWaitlistRepository
+from .event_speed_date_repository import EventSpeedDateRepository
+from .event_schedule_snapshot_repository import EventScheduleSnapshotRepository
+from .event_schedule_trace_repository import EventScheduleTraceRepository
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List
 from app.extensions import db
 from app.models import EventAttendee, User
 from app.models.enums import RegistrationStatus, Gender
@@ -33,6 +33,16 @@ class EventAttendeeRepository:
             .count()
         )
 
+    @staticmethod
+    def count_by_status_grouped_by_event(statuses: List[RegistrationStatus]) -> Dict[int, int]:
+        """{event_id: attendees with one of statuses} for every event that has any, in one query."""
+        rows = db.session.execute(
+            db.select(EventAttendee.event_id, db.func.count(EventAttendee.id))
+            .where(EventAttendee.status.in_(statuses))
+            .group_by(EventAttendee.event_id)
+        )
+        return {event_id: count for event_id, count in rows}
+
     @staticmethod
     def count_by_event_and_status_and_gender(
         event_id: int, statuses: List[RegistrationStatus], gender: Gender
@@ -1,5 +1,7 @@
+from typing import Optional, Tuple
+from sqlalchemy import func
 from app.extensions import db
-from app.models import Event
+from app.models import Event, EventAttendee, EventWaitlist
 
 
 class EventRepository:
@@ -11,6 +13,44 @@ class EventRepository:
     def get_event(event_id: int) -> Event:
         return Event.query.filter_by(id=event_id).first()
 
+    @staticmethod
+    def get_events_version(user_id: int) -> Tuple:
+        """
+        Changes whenever GET /events would: any event or registration is
+        added, removed or updated, or the user's waitlist entries change.
+        Waitlist rows are only ever inserted or deleted, so count and max id
+        cover them. One query of aggregates.
+        """
+        return tuple(db.session.execute(
+            db.select(
+                db.select(func.count(Event.id)).scalar_subquery(),
+                db.select(func.max(Event.updated_at)).scalar_subquery(),
+                db.select(func.count(EventAttendee.id)).scalar_subquery(),
+                db.select(func.max(EventAttendee.updated_at)).scalar_subquery(),
+                db.select(func.count(EventWaitlist.id)).where(EventWaitlist.user_id == user_id).scalar_subquery(),
+                db.select(func.max(EventWaitlist.id)).where(EventWaitlist.user_id == user_id).scalar_subquery(),
+            )
+        ).one())
+
+    @staticmethod
+    def get_event_version(event_id: int) -> Optional[Tuple]:
+        """
+        The event's updated_at plus its registrations' count and latest
+        update, or None if the event doesn't exist. One query.
+        """
+        row = db.session.execute(
+            db.select(
+                Event.updated_at,
+                db.select(func.count(EventAttendee.id))
+                .where(EventAttendee.event_id == event_id)
+                .scalar_subquery(),
+                db.select(func.max(EventAttendee.updated_at))
+                .where(EventAttendee.event_id == event_id)
+                .scalar_subquery(),
+            ).where(Event.id == event_id)
+        ).one_or_none()
+        return tuple(row) if row is not None else None
+
     @staticmethod
     def create_event(attrs):
         event = Event(**attrs)
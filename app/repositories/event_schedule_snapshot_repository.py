@@ -0,0 +1,75 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, insert
+from app.extensions import db
+from app.models import EventAttendee, EventScheduleSnapshot
+from app.models.enums import RegistrationStatus
+
+
+class EventScheduleSnapshotRepository:
+    @staticmethod
+    def find(event_id: int, user_id: int) -> Optional[str]:
+        """The attendee's serialized schedule, or None if there is no snapshot."""
+        return db.session.execute(
+            db.select(EventScheduleSnapshot.schedule).where(
+                EventScheduleSnapshot.event_id == event_id,
+                EventScheduleSnapshot.user_id == user_id,
+            )
+        ).scalar_one_or_none()
+
+    @staticmethod
+    def find_for_checked_in(event_id: int) -> List[Tuple[int, Optional[str]]]:
+        """
+        (user_id, serialized schedule) for every attendee checked in now,
+        with None for those without a snapshot, in one query.
+        """
+        rows = db.session.execute(
+            db.select(EventAttendee.user_id, EventScheduleSnapshot.schedule)
+            .outerjoin(
+                EventScheduleSnapshot,
+                (EventScheduleSnapshot.event_id == EventAttendee.event_id)
+                & (EventScheduleSnapshot.user_id == EventAttendee.user_id),
+            )
+            .where(
+                EventAttendee.event_id == event_id,
+                EventAttendee.status == RegistrationStatus.CHECKED_IN,
+            )
+            .order_by(EventAttendee.user_id)
+        )
+        return [(user_id, schedule) for user_id, schedule in rows]
+
+    @staticmethod
+    def save(event_id: int, schedules: Dict[int, str], user_ids: Optional[Iterable[int]] = None) -> None:
+        """
+        Writes {user_id: serialized schedule} in one transaction. With
+        user_ids only those attendees' rows are replaced; without, every
+        snapshot of the event is.
+        """
+        try:
+            statement = delete(EventScheduleSnapshot).where(EventScheduleSnapshot.event_id == event_id)
+            if user_ids is not None:
+                user_ids = list(user_ids)
+                statement = statement.where(EventScheduleSnapshot.user_id.in_(user_ids))
+            db.session.execute(statement)
+            if schedules:
+                db.session.execute(
+                    insert(EventScheduleSnapshot),
+                    [
+                        {"event_id": event_id, "user_id": user_id, "schedule": schedule}
+                        for user_id, schedule in schedules.items()
+                    ],
+                )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    @staticmethod
+    def delete_for_event(event_id: int) -> None:
+        try:
+            db.session.execute(
+                delete(EventScheduleSnapshot).where(EventScheduleSnapshot.event_id == event_id)
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
@@ -0,0 +1,24 @@
+from typing import List, Optional, Tuple
+from sqlalchemy import delete, insert
+from app.extensions import db
+from app.models import EventScheduleTrace
+
+
+class EventScheduleTraceRepository:
+    @staticmethod
+    def find(event_id: int) -> Optional[List[Tuple]]:
+        """The decisions of the event's latest traced run, or None if it has none."""
+        return db.session.execute(
+            db.select(EventScheduleTrace.decisions).where(EventScheduleTrace.event_id == event_id)
+        ).scalar_one_or_none()
+
+    @staticmethod
+    def save(event_id: int, decisions: List[Tuple]) -> None:
+        """Replaces the event's stored trace."""
+        try:
+            db.session.execute(delete(EventScheduleTrace).where(EventScheduleTrace.event_id == event_id))
+            db.session.execute(insert(EventScheduleTrace), [{"event_id": event_id, "decisions": decisions}])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
@@ -0,0 +1,171 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import case, delete, insert, or_, update
+from sqlalchemy.orm import aliased
+from app.extensions import db
+from app.models import Church, EventSpeedDate, User
+from app.services.matching.models import Pairing
+
+
+class EventSpeedDateRepository:
+    @staticmethod
+    def find_by_event_id(event_id: int) -> List[EventSpeedDate]:
+        return (
+            EventSpeedDate.query.filter_by(event_id=event_id)
+            .order_by(EventSpeedDate.round_number, EventSpeedDate.table_number)
+            .all()
+        )
+
+    @staticmethod
+    def find_with_attendees(
+        event_id: int, user_ids: Optional[Iterable[int]] = None
+    ) -> List[Tuple[EventSpeedDate, User, User, Optional[str], Optional[str]]]:
+        """
+        Every speed date of an event, or only those involving user_ids, with
+        both users and their church names, as (speed_date, male, female,
+        male_church, female_church) rows from a single query. Church names
+        are None when a user has no church.
+        """
+        male, female = aliased(User), aliased(User)
+        male_church, female_church = aliased(Church), aliased(Church)
+        query = (
+            db.session.query(EventSpeedDate, male, female, male_church.name, female_church.name)
+            .join(male, EventSpeedDate.male_id == male.id)
+            .join(female, EventSpeedDate.female_id == female.id)
+            .outerjoin(male_church, male.church_id == male_church.id)
+            .outerjoin(female_church, female.church_id == female_church.id)
+            .filter(EventSpeedDate.event_id == event_id)
+        )
+        if user_ids is not None:
+            user_ids = list(user_ids)
+            query = query.filter(
+                or_(EventSpeedDate.male_id.in_(user_ids), EventSpeedDate.female_id.in_(user_ids))
+            )
+        return query.order_by(EventSpeedDate.round_number, EventSpeedDate.table_number).all()
+
+    @staticmethod
+    def find_partners_by_event(user_id: int) -> Dict[int, Set[int]]:
+        """{event_id: ids of everyone the user is scheduled to meet} across all events."""
+        partner_id = case((EventSpeedDate.male_id == user_id, EventSpeedDate.female_id), else_=EventSpeedDate.male_id)
+        rows = db.session.execute(
+            db.select(EventSpeedDate.event_id, partner_id)
+            .where(or_(EventSpeedDate.male_id == user_id, EventSpeedDate.female_id == user_id))
+            .distinct()
+        )
+        partners: Dict[int, Set[int]] = {}
+        for event_id, partner in rows:
+            partners.setdefault(event_id, set()).add(partner)
+        return partners
+
+    @staticmethod
+    def find_rounds_for_user(event_id: int, user_id: int, round_numbers: List[int]) -> List[Tuple]:
+        """
+        The user's (round_number, table_number, speed_date_id, partner_id,
+        partner_first_name, partner_last_name) rows in the given rounds, in one
+        query served by the (event_id, male_id/female_id, round_number) indexes.
+        """
+        partner_id = case((EventSpeedDate.male_id == user_id, EventSpeedDate.female_id), else_=EventSpeedDate.male_id)
+        rows = db.session.execute(
+            db.select(
+                EventSpeedDate.round_number,
+                EventSpeedDate.table_number,
+                EventSpeedDate.id,
+                User.id,
+                User.first_name,
+                User.last_name,
+            )
+            .join(User, User.id == partner_id)
+            .where(
+                EventSpeedDate.event_id == event_id,
+                or_(EventSpeedDate.male_id == user_id, EventSpeedDate.female_id == user_id),
+                EventSpeedDate.round_number.in_(round_numbers),
+            )
+            .order_by(EventSpeedDate.round_number)
+        )
+        return [tuple(row) for row in rows]
+
+    @staticmethod
+    def find_past_pairs(user_ids: List[int], exclude_event_id: int) -> List[Tuple[int, int]]:
+        """
+        (male_id, female_id) pairs among user_ids who met at any other event,
+        in one query served by ix_events_speed_dates_male_female.
+        """
+        if not user_ids:
+            return []
+        rows = db.session.execute(
+            db.select(EventSpeedDate.male_id, EventSpeedDate.female_id)
+            .where(
+                EventSpeedDate.male_id.in_(user_ids),
+                EventSpeedDate.female_id.in_(user_ids),
+                EventSpeedDate.event_id != exclude_event_id,
+            )
+            .distinct()
+        )
+        return [(male_id, female_id) for male_id, female_id in rows]
+
+    @staticmethod
+    def replace_for_event(event_id: int, pairings: List[Pairing], commit: bool = True) -> int:
+        """
+        Replaces an event's schedule with the given pairings in a single
+        transaction: one DELETE plus one executemany INSERT, so readers see
+        either the old schedule or the new one, never a mix. With commit
+        False the transaction is left open for the caller to finish.
+        """
+        try:
+            db.session.execute(
+                delete(EventSpeedDate).where(EventSpeedDate.event_id == event_id)
+            )
+            if pairings:
+                db.session.execute(
+                    insert(EventSpeedDate),
+                    [
+                        {"event_id": event_id, **pairing._asdict()}
+                        for pairing in pairings
+                    ],
+                )
+            if commit:
+                db.session.commit()
+            return len(pairings)
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    @staticmethod
+    def apply_changes(
+        event_id: int,
+        deleted_ids: List[int],
+        table_updates: Dict[int, int],
+        inserted: List[Pairing],
+        commit: bool = True,
+    ) -> None:
+        """
+        Writes only the rows that changed in a schedule: deletes by id, table
+        moves by id ({speed_date_id: table_number}) and new pairings, all in
+        one transaction. With commit False the transaction is left open for
+        the caller to finish.
+        """
+        try:
+            if deleted_ids:
+                db.session.execute(
+                    delete(EventSpeedDate).where(EventSpeedDate.id.in_(deleted_ids))
+                )
+            if table_updates:
+                db.session.execute(
+                    update(EventSpeedDate),
+                    [
+                        {"id": speed_date_id, "table_number": table_number}
+                        for speed_date_id, table_number in table_updates.items()
+                    ],
+                )
+            if inserted:
+                db.session.execute(
+                    insert(EventSpeedDate),
+                    [
+                        {"event_id": event_id, **pairing._asdict()}
+                        for pairing in inserted
+                    ],
+                )
+            if commit:
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
@@ -1,4 +1,4 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
 from app.models.church import Church
 from app.models.event import Event
 from app.models.user import User
@@ -13,7 +13,9 @@ from flask_cors import cross_origin
 from app.exceptions import UnauthorizedError, MissingFieldsError
 from app.services.event_service import EventService
 from app.services.speed_date_service import SpeedDateService
+from app.services.schedule_job_service import ScheduleJobService
 from app.services.stripe_service import StripeService
+from app.utils.conditional import make_etag, not_modified, with_validators
 from datetime import datetime, timedelta, timezone
 from flask import current_app
 from sqlalchemy import or_
@@ -122,6 +124,17 @@ def update_event_timer_duration(event_id, round_duration=None, break_duration=No
     return timer
 
 
+def start_event_with_schedule(event_id, num_rounds, num_tables):
+    event = Event.query.get(event_id)
+    event.status = EventStatus.IN_PROGRESS.value
+    event.num_rounds = num_rounds
+    event.num_tables = num_tables
+    db.session.commit()
+    delete_event_timer(event_id)
+    create_event_timer(event_id)
+    current_app.logger.info(f"Event {event_id} status set to IN_PROGRESS.")
+
+
 def current_user_can_manage_event_timer(current_user, event):
     return current_user_can_manage_event(current_user, event)
 
@@ -145,6 +158,11 @@ def get_events():
     verify_jwt_in_request()
     user_id = get_jwt_identity()
 
+    etag = make_etag(user_id, *EventService.get_events_version(user_id))
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
     # Get all events
     events_data = EventService.get_events_for_user(user_id)
 
@@ -184,7 +202,9 @@ def get_events():
     final_registrations_data = list(registrations_map.values())
 
     # Return both events and comprehensive registrations data
-    return jsonify({"events": events_data, "registrations": final_registrations_data})
+    return with_validators(
+        jsonify({"events": events_data, "registrations": final_registrations_data}), etag
+    )
 
 
 @event_bp.route("/events/<int:event_id>", methods=["GET", "OPTIONS"])
@@ -197,6 +217,13 @@ def get_event_by_id(event_id):
         verify_jwt_in_request()
         user_id = get_jwt_identity()
 
+        version = EventService.get_event_version(event_id)
+        etag = make_etag(user_id, event_id, version)
+        if version is not None:
+            cached = not_modified(etag)
+            if cached:
+                return cached
+
         # Get the specific event
         event = Event.query.get_or_404(event_id)
         event_data = event.to_dict()
@@ -223,7 +250,7 @@ def get_event_by_id(event_id):
             }
             event_data["registration"] = registration_data
 
-        return jsonify(event_data)
+        return with_validators(jsonify(event_data), etag)
     except Exception as e:
         print(f"Error fetching event {event_id}: {str(e)}")
         return jsonify({"error": "Failed to fetch event details"}), 500
@@ -405,6 +432,19 @@ def generate_schedules(event_id):
         except (ValueError, TypeError):
             return (jsonify({"error": "Invalid input for tables or rounds, must be integers"}),400,)
 
+        try:
+            time_budget_ms = int(data.get("time_budget_ms", 0))
+            if not 0 <= time_budget_ms <= SpeedDateService.MAX_TIME_BUDGET_MS:
+                return (jsonify({"error": f"time_budget_ms must be between 0 and {SpeedDateService.MAX_TIME_BUDGET_MS}"}), 400,)
+        except (ValueError, TypeError):
+            return (jsonify({"error": "Invalid input for time_budget_ms, must be an integer"}), 400,)
+        if time_budget_ms > SpeedDateService.MAX_SYNC_TIME_BUDGET_MS and not data.get("async"):
+            return (jsonify({"error": f"time_budget_ms above {SpeedDateService.MAX_SYNC_TIME_BUDGET_MS} requires async generation"}), 400,)
+
+        strategy = data.get("strategy", "greedy")
+        if strategy not in SpeedDateService.STRATEGIES:
+            return (jsonify({"error": f"Unknown strategy. Must be one of: {', '.join(SpeedDateService.STRATEGIES)}"}), 400,)
+
         if not current_user_can_manage_event(current_user, event):
             return jsonify({"error": "Unauthorized"}), 403
         if event.status != EventStatus.REGISTRATION_OPEN.value:
@@ -415,18 +455,24 @@ def generate_schedules(event_id):
                 400,
             )
 
+        active_job = ScheduleJobService.find_active_job(event_id)
+        if active_job:
+            return (jsonify({"error": "Schedule generation is already running", "job": active_job.to_dict()}), 409,)
+
+        if data.get("async"):
+            job, created = ScheduleJobService.submit(
+                event_id, num_tables, num_rounds, strategy, time_budget_ms, start_event_with_schedule
+            )
+            if not created:
+                return (jsonify({"error": "Schedule generation is already running", "job": job.to_dict()}), 409,)
+            return jsonify({"message": "Event schedule generation started", "job": job.to_dict()}), 202
+
         num_rounds_actual, num_tables_actual = SpeedDateService.generate_schedule(
-            event_id, num_tables, num_rounds
+            event_id, num_tables, num_rounds, strategy, time_budget_ms
         )
 
         if num_rounds_actual > 0:
-            event.status = EventStatus.IN_PROGRESS.value
-            event.num_rounds = num_rounds_actual
-            event.num_tables = num_tables_actual
-            db.session.commit()
-            delete_event_timer(event_id)
-            create_event_timer(event_id)
-            current_app.logger.info(f"Event {event_id} status set to IN_PROGRESS.")
+            start_event_with_schedule(event_id, num_rounds_actual, num_tables_actual)
             return jsonify({"message": "Event schedule generated"})
         else:
             current_app.logger.warning(f"Event {event_id} schedule generation failed")
@@ -440,6 +486,173 @@ def generate_schedules(event_id):
         return jsonify({"error": "Failed to start event"}), 500
 
 
+@event_bp.route("/events/<int:event_id>/schedules/repair", methods=["POST"])
+@cross_origin(supports_credentials=True)
+@jwt_required()
+def repair_schedules(event_id):
+    current_user_id = get_jwt_identity()
+
+    try:
+        event = Event.query.get_or_404(event_id)
+        current_user = User.query.get(current_user_id)
+        if not current_user_can_manage_event(current_user, event):
+            return jsonify({"error": "Unauthorized"}), 403
+        if event.status != EventStatus.IN_PROGRESS.value:
+            return (jsonify({"error": "Schedule can only be repaired while the event is in progress"}), 400,)
+
+        data = request.get_json() or {}
+        strategy = data.get("strategy", "greedy")
+        if strategy not in SpeedDateService.REPAIR_STRATEGIES:
+            return (jsonify({"error": f"Unknown strategy. Must be one of: {', '.join(SpeedDateService.REPAIR_STRATEGIES)}"}), 400,)
+
+        timer = get_event_timer(event_id)
+        frozen_through = timer.current_round if timer else 0
+
+        result = SpeedDateService.repair_schedule(
+            event_id, event.num_tables or 0, event.num_rounds or 0, frozen_through, strategy
+        )
+
+        if result["num_rounds"] > 0:
+            event.num_rounds = result["num_rounds"]
+            event.num_tables = max(event.num_tables or 0, result["num_tables"])
+            if timer:
+                timer.final_round = result["num_rounds"]
+            db.session.commit()
+
+        return jsonify({"message": "Event schedule repaired", **result}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(
+            f"Error repairing schedule for event {event_id}: {str(e)}", exc_info=True
+        )
+        return jsonify({"error": "Failed to repair schedule"}), 500
+
+
+@event_bp.route("/events/<int:event_id>/schedules/verify", methods=["GET"])
+@cross_origin(supports_credentials=True)
+@jwt_required()
+def verify_schedules(event_id):
+    current_user_id = get_jwt_identity()
+
+    try:
+        event = Event.query.get_or_404(event_id)
+        current_user = User.query.get(current_user_id)
+        if not current_user_can_manage_event(current_user, event):
+            return jsonify({"error": "Unauthorized"}), 403
+
+        report = SpeedDateService.verify_schedule(event_id)
+        return jsonify(report.to_dict()), 200
+
+    except Exception as e:
+        current_app.logger.error(
+            f"Error verifying schedule for event {event_id}: {str(e)}", exc_info=True
+        )
+        return jsonify({"error": "Failed to verify schedule"}), 500
+
+
+@event_bp.route("/events/<int:event_id>/schedule/capacity", methods=["GET"])
+@cross_origin(supports_credentials=True)
+@jwt_required()
+def get_schedule_capacity(event_id):
+    current_user_id = get_jwt_identity()
+
+    try:
+        event = Event.query.get_or_404(event_id)
+        current_user = User.query.get(current_user_id)
+        if not current_user_can_manage_event(current_user, event):
+            return jsonify({"error": "Unauthorized"}), 403
+
+        try:
+            num_tables = int(request.args.get("num_tables", event.num_tables or 15))
+            num_rounds = int(request.args.get("num_rounds", event.num_rounds or 15))
+            if num_tables < 1 or num_rounds < 1:
+                return (jsonify({"error": "Number of tables and rounds must be positive integers"}), 400,)
+        except (ValueError, TypeError):
+            return (jsonify({"error": "Invalid input for tables or rounds, must be integers"}), 400,)
+
+        report = SpeedDateService.analyze_capacity(event_id, num_tables, num_rounds)
+        return jsonify(report.to_dict()), 200
+
+    except Exception as e:
+        current_app.logger.error(
+            f"Error analyzing schedule capacity for event {event_id}: {str(e)}", exc_info=True
+        )
+        return jsonify({"error": "Failed to analyze schedule capacity"}), 500
+
+
+@event_bp.route("/events/<int:event_id>/schedules/trace", methods=["PUT"])
+@cross_origin(supports_credentials=True)
+@jwt_required()
+def set_schedule_tracing(event_id):
+    current_user_id = get_jwt_identity()
+
+    try:
+        event = Event.query.get_or_404(event_id)
+        current_user = User.query.get(current_user_id)
+        if not current_user_can_manage_event(current_user, event):
+            return jsonify({"error": "Unauthorized"}), 403
+
+        data = request.get_json() or {}
+        enabled = data.get("enabled")
+        if not isinstance(enabled, bool):
+            return jsonify({"error": "enabled must be true or false"}), 400
+
+        SpeedDateService.set_schedule_tracing(event_id, enabled)
+        return jsonify({"enabled": enabled}), 200
+
+    except Exception as e:
+        current_app.logger.error(
+            f"Error setting schedule tracing for event {event_id}: {str(e)}", exc_info=True
+        )
+        return jsonify({"error": "Failed to set schedule tracing"}), 500
+
+
+@event_bp.route("/events/<int:event_id>/schedules/trace", methods=["GET"])
+@cross_origin(supports_credentials=True)
+@jwt_required()
+def get_schedule_trace(event_id):
+    current_user_id = get_jwt_identity()
+
+    try:
+        event = Event.query.get_or_404(event_id)
+        current_user = User.query.get(current_user_id)
+        if not current_user_can_manage_event(current_user, event):
+            return jsonify({"error": "Unauthorized"}), 403
+
+        return jsonify(SpeedDateService.get_schedule_trace(event_id)), 200
+
+    except Exception as e:
+        current_app.logger.error(
+            f"Error fetching schedule trace for event {event_id}: {str(e)}", exc_info=True
+        )
+        return jsonify({"error": "Failed to fetch schedule trace"}), 500
+
+
+@event_bp.route("/events/<int:event_id>/generate/schedules/<int:job_id>", methods=["GET"])
+@jwt_required()
+def get_schedule_job(event_id, job_id):
+    current_user_id = get_jwt_identity()
+
+    try:
+        event = Event.query.get_or_404(event_id)
+        current_user = User.query.get(current_user_id)
+        if not current_user_can_manage_event(current_user, event):
+            return jsonify({"error": "Unauthorized"}), 403
+
+        job = ScheduleJobService.get_job(event_id, job_id)
+        if not job:
+            return jsonify({"error": "Schedule job not found"}), 404
+
+        return jsonify({"job": job.to_dict()}), 200
+
+    except Exception as e:
+        current_app.logger.error(
+            f"Error retrieving schedule job {job_id} for event {event_id}: {str(e)}"
+        )
+        return jsonify({"error": "Failed to retrieve schedule job"}), 500
+
+
 @event_bp.route("/events/<int:event_id>/check-in", methods=["POST"])
 @jwt_required()
 def check_in(event_id):
@@ -764,6 +977,11 @@ def update_attendee_details(event_id, attendee_id):
         # Save changes if any fields were updated
         if updated_fields:
             db.session.commit()
+            if {"gender", "birthday", "church"} & set(updated_fields):
+                SpeedDateService.invalidate_cached_schedules(user_to_update.id)
+            # schedule snapshots show names, emails, ages and churches
+            if {"first_name", "last_name", "email", "gender", "birthday", "church"} & set(updated_fields):
+                SpeedDateService.refresh_user_schedule_snapshots(user_to_update.id)
 
             # Refresh the user_to_update object to get the latest church data
             db.session.refresh(user_to_update)
@@ -934,6 +1152,11 @@ def update_waitlist_attendee_details(event_id, user_id):
         # Save changes if any fields were updated
         if updated_fields:
             db.session.commit()
+            if {"gender", "birthday", "church"} & set(updated_fields):
+                SpeedDateService.invalidate_cached_schedules(user_to_update.id)
+            # schedule snapshots show names, emails, ages and churches
+            if {"first_name", "last_name", "email", "gender", "birthday", "church"} & set(updated_fields):
+                SpeedDateService.refresh_user_schedule_snapshots(user_to_update.id)
 
             # Refresh the user_to_update object to get the latest church data
             db.session.refresh(user_to_update)
@@ -1056,12 +1279,27 @@ def get_schedule(event_id):
         if not attendee:
             return jsonify({"error": "You are not registered for this event"}), 403
 
-        schedule = SpeedDateService.get_schedule_for_attendee(event_id, current_user_id)
+        # Serve the stored snapshot as-is when there is one; events scheduled
+        # before snapshots existed fall back to building it live.
+        snapshot = SpeedDateService.get_schedule_snapshot(event_id, current_user_id)
+        if snapshot is not None and snapshot != "[]":
+            etag = make_etag(snapshot)
+            return not_modified(etag) or with_validators(
+                Response(f'{{"schedule":{snapshot}}}', status=200, mimetype="application/json"), etag
+            )
+
+        schedule = (
+            SpeedDateService.get_schedule_for_attendee(event_id, current_user_id)
+            if snapshot is None
+            else []
+        )
 
         if not schedule:
             return (jsonify({"message": "No schedule available. Make sure you are checked in."}),404,)
 
-        return jsonify({"schedule": schedule}), 200
+        response = jsonify({"schedule": schedule})
+        etag = make_etag(response.get_data())
+        return not_modified(etag) or with_validators(response, etag)
 
     except Exception as e:
         print(
@@ -1070,6 +1308,54 @@ def get_schedule(event_id):
         return jsonify({"error": "Failed to retrieve schedule"}), 500
 
 
+@event_bp.route("/events/<int:event_id>/schedule/current", methods=["GET"])
+@jwt_required()
+def get_current_schedule(event_id):
+    current_user_id = get_jwt_identity()
+
+    try:
+        event = Event.query.get_or_404(event_id)
+
+        if event.status not in [
+            EventStatus.IN_PROGRESS.value,
+            EventStatus.COMPLETED.value,
+        ]:
+            return (jsonify({"error": "Schedule not available. Event has not started"}), 400,)
+
+        attendee = EventAttendee.query.filter_by(event_id=event_id, user_id=current_user_id).first()
+
+        if not attendee:
+            return jsonify({"error": "You are not registered for this event"}), 403
+
+        timer = get_event_timer(event_id)
+        current_round = timer.current_round if timer else 1
+        include_next = request.args.get("include_next", "").lower() in ("1", "true", "yes")
+        rounds = [current_round, current_round + 1] if include_next else [current_round]
+        assignments = SpeedDateService.get_round_assignments(event_id, current_user_id, rounds)
+
+        # "current" / "next" are null for rounds the attendee sits out
+        body = {
+            "round": current_round,
+            "final_round": timer.final_round if timer else event.num_rounds,
+            "current": assignments.get(current_round),
+        }
+        if include_next:
+            body["next"] = assignments.get(current_round + 1)
+
+        # Phones poll this every few seconds. The ETag is keyed on the round
+        # (plus a digest of the body, so a repaired schedule still shows up),
+        # and no-cache makes them revalidate: unchanged rounds cost a 304.
+        response = jsonify(body)
+        etag = f"round-{current_round}-{make_etag(response.get_data())[:16]}"
+        return not_modified(etag) or with_validators(response, etag)
+
+    except Exception as e:
+        current_app.logger.error(
+            f"Error retrieving current round for event {event_id}, user {current_user_id}: {str(e)}"
+        )
+        return jsonify({"error": "Failed to retrieve current round"}), 500
+
+
 @event_bp.route("/events/<int:event_id>/all-schedules", methods=["GET"])
 @jwt_required()
 def get_all_schedules(event_id):
@@ -1103,6 +1389,10 @@ def get_all_schedules(event_id):
                 400,
             )
 
+        snapshots = SpeedDateService.get_all_schedule_snapshots(event_id)
+        if snapshots is not None:
+            return Response(f'{{"schedules":{snapshots}}}', status=200, mimetype="application/json")
+
         # Get all schedules
         schedules = SpeedDateService.get_all_schedules(event_id)
 
@@ -1123,9 +1413,14 @@ def get_timer_status(event_id):
             return jsonify({"error": "User not found"}), 403
 
         timer = get_event_timer(event_id)
+        # every timer change goes through the ORM, which bumps updated_at
+        etag = make_etag(event_id, timer.id, timer.updated_at) if timer else make_etag(event_id, None)
+        cached = not_modified(etag)
+        if cached:
+            return cached
         if not timer:
-            return jsonify(None), 200
-        return jsonify(timer.to_dict()), 200
+            return with_validators(jsonify(None), etag), 200
+        return with_validators(jsonify(timer.to_dict()), etag), 200
     except Exception as e:
         print(f"Error retrieving timer status for event {event_id}: {str(e)}")
         return jsonify({"error": "Failed to retrieve timer status"}), 500
@@ -1454,6 +1749,8 @@ def submit_speed_date_selections(event_id):
 
         updated_count = 0
         errors = []
+        # the submitter and their partners, whose schedules show this interest
+        affected_user_ids = {current_user_id}
         current_app.logger.info(
             f"Processing {len(selections)} selections for event {event_id}, user {current_user_id}."
         )
@@ -1503,6 +1800,7 @@ def submit_speed_date_selections(event_id):
                     user_id=current_user_id, interested=interested
                 )
                 db.session.add(speed_date_entry)
+                affected_user_ids.update((speed_date_entry.male_id, speed_date_entry.female_id))
                 updated_count += 1
             except ValueError as ve:
                 error_detail = f"Error recording interest for speed date ID {event_speed_date_id}: {str(ve)}"
@@ -1542,6 +1840,7 @@ def submit_speed_date_selections(event_id):
             )
 
         db.session.commit()
+        SpeedDateService.refresh_schedule_snapshots(event_id, affected_user_ids)
         current_app.logger.info(
             f"User {current_user_id} successfully submitted {updated_count} selections for event {event_id}."
         )
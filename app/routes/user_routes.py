@@ -5,12 +5,14 @@ from app.models.enums import Gender
 from app.models.church import Church
 from app.extensions import db
 from app.utils.email import send_password_reset_email
+from app.utils.conditional import make_etag, not_modified, with_validators
 from app.services.stripe_service import StripeService
 from app.services.event_service import EventService
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token
 from flask import current_app
 from datetime import timedelta, datetime
+from sqlalchemy import func
 import logging
 
 user_bp = Blueprint("user", __name__)
@@ -225,8 +227,13 @@ def reset_password(token):
 @user_bp.route("/churches", methods=["GET"])
 def get_churches():
     try:
+        # churches are only ever added, so count and max id identify the list
+        etag = make_etag(*db.session.execute(db.select(func.count(Church.id), func.max(Church.id))).one())
+        cached = not_modified(etag, "public, no-cache")
+        if cached:
+            return cached
         churches = Church.query.order_by(Church.name.asc()).all()
-        return jsonify([church.name for church in churches]), 200
+        return with_validators(jsonify([church.name for church in churches]), etag, "public, no-cache"), 200
     except Exception:
         return jsonify({"error": "Failed to fetch churches"}), 500
 
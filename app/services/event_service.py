@@ -10,7 +10,8 @@ from app.exceptions import UnauthorizedError, MissingFieldsError
 from app.models.enums import EventStatus, Gender, RegistrationStatus
 from app.models import Event
 from app.services.stripe_service import StripeService
-from typing import List
+from app.services.matching.rules import MatchingRules
+from typing import List, Optional, Tuple
 
 
 class EventService:
@@ -18,6 +19,16 @@ class EventService:
     def get_events() -> List[Event]:
         return EventRepository.get_events()
 
+    @staticmethod
+    def get_events_version(user_id: int) -> Tuple:
+        """Validator for the user's GET /events response; see EventRepository.get_events_version."""
+        return EventRepository.get_events_version(user_id)
+
+    @staticmethod
+    def get_event_version(event_id: int) -> Optional[Tuple]:
+        """Validator for GET /events/<id>, or None if the event doesn't exist."""
+        return EventRepository.get_event_version(event_id)
+
     @staticmethod
     def get_events_for_user(user_id):
         user = UserRepository.find_by_id(user_id)
@@ -25,7 +36,14 @@ class EventService:
             return ({"error": "User not found"}), 404
 
         events = EventRepository.get_events()
-        return [event.to_dict() for event in events]
+        # one grouped count for every event instead of a COUNT per event
+        registered_counts = EventAttendeeRepository.count_by_status_grouped_by_event(
+            list(Event.REGISTERED_STATUSES)
+        )
+        return [
+            event.to_dict(registered_attendee_count=registered_counts.get(event.id, 0))
+            for event in events
+        ]
 
     @staticmethod
     def create_event(data, user_id):
@@ -333,6 +351,7 @@ class EventService:
             "price_per_person",
             "status",
             "registration_deadline",
+            "matching_rules",
         ]
         update_data = {}
 
@@ -378,6 +397,15 @@ class EventService:
                     if value not in [s.value for s in EventStatus]:
                         return None, {"error": f"Invalid status value: {value}"}, 400
                     update_data[field] = value
+                elif field == "matching_rules":
+                    try:
+                        update_data[field] = (
+                            MatchingRules.from_dict(value).to_dict()
+                            if value is not None
+                            else None
+                        )
+                    except ValueError as e:
+                        return None, {"error": str(e)}, 400
                 else:
                     update_data[field] = value
 
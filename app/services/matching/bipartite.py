@@ -0,0 +1,226 @@
+from collections import deque
+from typing import Callable, List, Dict, Optional
+from app.services.matching.history import PairHistory
+from app.services.matching.models import Attendee, Pairing
+from app.services.matching.matcher import SpeedDateMatcher
+from app.services.matching.tracing import ScheduleTrace
+import logging
+
+logger = logging.getLogger(__name__)
+
+UNMATCHED = -1
+
+
+class BipartiteRoundBuilder:
+    """
+    Alternative to SpeedDateMatcher.finalize_all_rounds that seats every round
+    with a maximum-cardinality matching (Hopcroft-Karp) over the males x females
+    graph of compatible pairs that have not met yet.
+
+    Each round is seeded with a greedy matching in priority order (fewest rounds
+    completed, then smallest age difference). Augmenting paths never unmatch a
+    vertex, so everyone seated by the seed stays seated and Hopcroft-Karp only
+    adds the pairs the greedy pass missed.
+    """
+
+    @staticmethod
+    def finalize_all_rounds(
+        all_compatible_dates: Dict[int, List[Attendee]],
+        id_to_user: Dict[int, Attendee],
+        num_tables: int,
+        num_rounds: int,
+        on_round: Optional[Callable[[int, int], None]] = None,
+        rounds_completed: Optional[Dict[int, int]] = None,
+        previous_tables: Optional[Dict[int, int]] = None,
+        pair_history: Optional[PairHistory] = None,
+        trace: Optional[ScheduleTrace] = None,
+    ) -> List[Pairing]:
+        logger.info(
+            "Starting matching-based schedule generation: %d attendees, %d tables, %d rounds",
+            len(all_compatible_dates), num_tables, num_rounds,
+        )
+        if trace is not None:
+            trace.record(("start", "matching", len(all_compatible_dates), num_tables, num_rounds))
+
+        male_ids = [uid for uid in all_compatible_dates if id_to_user[uid].is_male]
+        female_ids = [uid for uid in all_compatible_dates if not id_to_user[uid].is_male]
+        male_index = {uid: i for i, uid in enumerate(male_ids)}
+        female_index = {uid: j for j, uid in enumerate(female_ids)}
+        ages = {uid: id_to_user[uid].age for uid in all_compatible_dates}
+
+        # A pair can meet if either side has the other in their compatible list,
+        # which is what the greedy scheduler allows as well.
+        adjacency = [set() for _ in male_ids]
+        for uid, compatible_dates in all_compatible_dates.items():
+            for partner in compatible_dates:
+                if uid in male_index and partner.id in female_index:
+                    adjacency[male_index[uid]].add(female_index[partner.id])
+                elif uid in female_index and partner.id in male_index:
+                    adjacency[male_index[partner.id]].add(female_index[uid])
+
+        # Pairs who met at earlier events rank behind every new pair, as in
+        # SpeedDateMatcher.
+        past_partners = [set() for _ in male_ids]
+        if pair_history is not None and len(pair_history):
+            for m, male_id in enumerate(male_ids):
+                partners = sorted(adjacency[m])
+                met_before = pair_history.met_with(male_id, [female_ids[f] for f in partners])
+                past_partners[m] = {f for f, met in zip(partners, met_before) if met}
+
+        # Each male's candidates by the part of their priority that never
+        # changes (age difference plus past-pair penalty, then index), sorted
+        # once. Rounds only re-sort by rounds completed, with a stable sort,
+        # which yields the full (rounds, cost, index) order.
+        partner_order = [
+            sorted(
+                adjacency[m],
+                key=lambda f, m=m: (
+                    abs(ages[male_ids[m]] - ages[female_ids[f]])
+                    + SpeedDateMatcher.PAST_PAIR_PENALTY * (f in past_partners[m]),
+                    f,
+                ),
+            )
+            for m in range(len(male_ids))
+        ]
+
+        rounds_completed = rounds_completed or {}
+        male_rounds = [rounds_completed.get(uid, 0) for uid in male_ids]
+        female_rounds = [rounds_completed.get(uid, 0) for uid in female_ids]
+        previous_tables = dict(previous_tables or {})
+        event_speed_dates: List[Pairing] = []
+
+        for current_round in range(1, num_rounds + 1):
+            # Candidates ordered by partner priority so both the greedy seed and
+            # the augmenting search try the best partner first.
+            ordered_adjacency = [sorted(partners, key=female_rounds.__getitem__) for partners in partner_order]
+            male_order = sorted(
+                range(len(male_ids)),
+                key=lambda m: (male_rounds[m], len(partner_order[m]), m),
+            )
+
+            match_male, match_female = BipartiteRoundBuilder._greedy_seed(ordered_adjacency, male_order, len(female_ids), num_tables)
+            BipartiteRoundBuilder._hopcroft_karp(ordered_adjacency, male_order, match_male, match_female, num_tables)
+
+            pairs = [(m, match_male[m]) for m in male_order if match_male[m] != UNMATCHED]
+            if not pairs:
+                logger.info("No compatible pairs left, stopping at round %d", current_round - 1)
+                break
+
+            round_tables = SpeedDateMatcher.assign_round_tables(
+                [(male_ids[m], female_ids[f]) for m, f in pairs], previous_tables, num_tables
+            )
+            for (m, f), table_number in zip(pairs, round_tables):
+                SpeedDateMatcher.assign_table(event_speed_dates, male_ids[m], female_ids[f], table_number, current_round)
+                if trace is not None:
+                    reused_table = table_number in (previous_tables.get(male_ids[m]), previous_tables.get(female_ids[f]))
+                    trace.record(("seat", current_round, table_number, male_ids[m], female_ids[f], reused_table))
+                male_rounds[m] += 1
+                female_rounds[f] += 1
+                partner_order[m].remove(f)
+
+            previous_tables = {}
+            for (m, f), table_number in zip(pairs, round_tables):
+                previous_tables[male_ids[m]] = table_number
+                previous_tables[female_ids[f]] = table_number
+
+            logger.info("Round %d: filled %d of %d tables", current_round, len(pairs), num_tables)
+            if trace is not None:
+                trace.record(("round_end", current_round, len(pairs)))
+            if on_round:
+                on_round(current_round, len(pairs))
+
+        return event_speed_dates
+
+    @staticmethod
+    def _greedy_seed(ordered_adjacency, male_order, num_females, num_tables):
+        match_male = [UNMATCHED] * len(ordered_adjacency)
+        match_female = [UNMATCHED] * num_females
+        seated = 0
+        for m in male_order:
+            if seated >= num_tables:
+                break
+            for f in ordered_adjacency[m]:
+                if match_female[f] == UNMATCHED:
+                    match_male[m] = f
+                    match_female[f] = m
+                    seated += 1
+                    break
+        return match_male, match_female
+
+    @staticmethod
+    def _hopcroft_karp(ordered_adjacency, male_order, match_male, match_female, target_size):
+        """
+        Grows the matching in place with shortest augmenting paths until it is
+        maximum or already covers target_size pairs. Free males are tried in
+        male_order so higher-priority attendees get seated first.
+        """
+        size = sum(1 for f in match_male if f != UNMATCHED)
+        num_males = len(ordered_adjacency)
+
+        while size < target_size:
+            # BFS from every free male builds the layered graph, stopping at
+            # the first layer that reaches a free female: only shortest
+            # augmenting paths are used, so deeper layers are never walked.
+            dist = [-1] * num_males
+            queue = deque()
+            for m in range(num_males):
+                if match_male[m] == UNMATCHED:
+                    dist[m] = 0
+                    queue.append(m)
+            shortest = None
+            while queue:
+                m = queue.popleft()
+                if shortest is not None and dist[m] > shortest:
+                    break
+                for f in ordered_adjacency[m]:
+                    partner = match_female[f]
+                    if partner == UNMATCHED:
+                        shortest = dist[m]
+                    elif dist[partner] == -1:
+                        dist[partner] = dist[m] + 1
+                        queue.append(partner)
+            if shortest is None:
+                break
+
+            # Iterative DFS along the layers so large events don't hit the
+            # recursion limit.
+            next_edge = [0] * num_males
+            for root in male_order:
+                if size >= target_size:
+                    break
+                if match_male[root] != UNMATCHED or dist[root] != 0:
+                    continue
+                stack = [root]
+                path_females = []
+                while stack:
+                    m = stack[-1]
+                    edges = ordered_adjacency[m]
+                    next_layer = dist[m] + 1
+                    # index kept in a local in this hot loop, written back below
+                    i, num_edges = next_edge[m], len(edges)
+                    advanced = False
+                    while i < num_edges:
+                        f = edges[i]
+                        i += 1
+                        partner = match_female[f]
+                        if partner == UNMATCHED:
+                            path_females.append(f)
+                            for male, female in zip(stack, path_females):
+                                match_male[male] = female
+                                match_female[female] = male
+                            size += 1
+                            stack = []
+                            advanced = True
+                            break
+                        if dist[partner] == next_layer:
+                            path_females.append(f)
+                            stack.append(partner)
+                            advanced = True
+                            break
+                    next_edge[m] = i
+                    if not advanced:
+                        # Dead end: drop this male from the layered graph.
+                        dist[m] = -1
+                        stack.pop()
+                        if path_females:
+                            path_females.pop()
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, List, Optional, Set, Tuple
+from app.services.matching.models import Attendee, Pairing
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduleCache:
+    """
+    Per-process LRU cache of generated schedules, so pressing "generate"
+    again with the same checked-in attendees and settings skips the matcher.
+
+    Keys hash every attendee attribute the matcher reads, so a changed
+    birthday or church can never produce a stale hit; invalidate_user also
+    drops that user's entries straight away instead of waiting for eviction.
+
+    Entries live in the memory of the process that generated them and are
+    not shared. Under several gunicorn workers a repeat press only hits if
+    it lands on the worker that served the first one, and invalidate_user
+    only reaches the worker handling that request; the hashed keys are what
+    keep the other workers from serving stale schedules.
+    """
+
+    MAX_ENTRIES = 32
+
+    # key -> (pairings, ids of the attendees the schedule was built for)
+    _entries: "OrderedDict[str, Tuple[List[Pairing], Tuple[int, ...]]]" = OrderedDict()
+    _keys_by_user: Dict[int, Set[str]] = {}
+    _lock = Lock()
+
+    @staticmethod
+    def key(attendees: List[Attendee], num_tables: int, num_rounds: int, **settings: Any) -> str:
+        """
+        settings holds everything else that shapes the schedule (strategy,
+        rules, seed, ...); values must have a stable repr.
+        """
+        parts = (
+            sorted(tuple(attendee) for attendee in attendees),
+            num_tables,
+            num_rounds,
+            sorted(settings.items()),
+        )
+        return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+    @staticmethod
+    def get(key: str) -> Optional[List[Pairing]]:
+        with ScheduleCache._lock:
+            entry = ScheduleCache._entries.get(key)
+            if entry is None:
+                return None
+            ScheduleCache._entries.move_to_end(key)
+            return list(entry[0])
+
+    @staticmethod
+    def put(key: str, attendees: List[Attendee], pairings: List[Pairing]) -> None:
+        with ScheduleCache._lock:
+            user_ids = tuple(attendee.id for attendee in attendees)
+            ScheduleCache._entries[key] = (list(pairings), user_ids)
+            ScheduleCache._entries.move_to_end(key)
+            for user_id in user_ids:
+                ScheduleCache._keys_by_user.setdefault(user_id, set()).add(key)
+            while len(ScheduleCache._entries) > ScheduleCache.MAX_ENTRIES:
+                evicted, (_, evicted_user_ids) = ScheduleCache._entries.popitem(last=False)
+                ScheduleCache._forget(evicted, evicted_user_ids)
+                logger.info("Evicted cached schedule %s", evicted[:12])
+
+    @staticmethod
+    def invalidate_user(user_id: int) -> int:
+        """Drops every cached schedule that includes user_id; returns how many."""
+        with ScheduleCache._lock:
+            keys = list(ScheduleCache._keys_by_user.get(user_id, ()))
+            for key in keys:
+                _, user_ids = ScheduleCache._entries.pop(key)
+                ScheduleCache._forget(key, user_ids)
+            return len(keys)
+
+    @staticmethod
+    def _forget(key: str, user_ids: Tuple[int, ...]) -> None:
+        for user_id in user_ids:
+            keys = ScheduleCache._keys_by_user.get(user_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del ScheduleCache._keys_by_user[user_id]
@@ -0,0 +1,142 @@
+from typing import Any, Dict, List, NamedTuple, Optional
+from app.services.matching.models import Attendee
+from app.services.matching.matcher import SpeedDateMatcher
+from app.services.matching.compatibility import CompatibilityMatrix
+from app.services.matching.history import PairHistory
+from app.services.matching.rules import MatchingRules
+import numpy as np
+
+
+class CapacityReport(NamedTuple):
+    num_males: int
+    num_females: int
+    # the requested tables and rounds, with tables clamped the way
+    # generate_schedule clamps them
+    num_tables: int
+    num_rounds: int
+    # tables that can ever be filled: both genders' attendees with any date
+    recommended_tables: int
+    # most rounds that can fill every table; an upper bound, since it only
+    # counts how many dates each attendee has left
+    achievable_rounds: int
+    # dates the requested tables and rounds can hold, at most
+    expected_total_dates: int
+    # per gender min/mean/max dates per attendee if dates are spread evenly
+    expected_dates: Dict[str, Dict[str, float]]
+    # per gender min_dates_threshold for the requested tables and rounds
+    min_dates_needed: Dict[str, int]
+    # attendees with fewer compatible dates than their gender needs, or
+    # with none at all
+    short_of_dates: int
+    without_dates: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+
+class CapacityAdvisor:
+    """
+    Estimates what tables and rounds an event can support from the degree
+    statistics of its compatibility graph (how many compatible dates each
+    attendee has), without seating anyone.
+
+    A round with t tables needs t dates from each gender, and an attendee
+    with d compatible dates can sit at most min(d, r) of r rounds. So r full
+    rounds are only possible while sum(min(d, r)) >= t * r on both sides,
+    which is checked for every r at once from the sorted degrees.
+    """
+
+    @staticmethod
+    def analyze(
+        males: List[Attendee],
+        females: List[Attendee],
+        num_tables: int,
+        num_rounds: int,
+        rules: Optional[MatchingRules] = None,
+        pair_history: Optional[PairHistory] = None,
+    ) -> CapacityReport:
+        num_tables = min(num_tables, len(males), len(females))
+        male_mask, female_mask = CompatibilityMatrix.build_masks(
+            males, females, num_tables, num_rounds, rules, pair_history
+        )
+        # A pair can meet if either side has the other in their compatible
+        # list, which is what the round builders allow.
+        edges = male_mask | female_mask.T
+        male_degrees = edges.sum(axis=1)
+        female_degrees = edges.sum(axis=0)
+
+        recommended_tables = int(min(np.count_nonzero(male_degrees), np.count_nonzero(female_degrees)))
+        achievable_rounds = min(
+            CapacityAdvisor._full_rounds(male_degrees, num_tables),
+            CapacityAdvisor._full_rounds(female_degrees, num_tables),
+        )
+        total_dates = int(min(
+            num_tables * num_rounds,
+            np.minimum(male_degrees, num_rounds).sum(),
+            np.minimum(female_degrees, num_rounds).sum(),
+        ))
+        min_dates_needed = {
+            "males": SpeedDateMatcher.min_dates_threshold(num_tables, num_rounds, len(males)),
+            "females": SpeedDateMatcher.min_dates_threshold(num_tables, num_rounds, len(females)),
+        }
+        short_of_dates = np.count_nonzero(male_degrees < min_dates_needed["males"]) + np.count_nonzero(
+            female_degrees < min_dates_needed["females"]
+        )
+        degrees = np.concatenate([male_degrees, female_degrees])
+
+        return CapacityReport(
+            num_males=len(males),
+            num_females=len(females),
+            num_tables=num_tables,
+            num_rounds=num_rounds,
+            recommended_tables=recommended_tables,
+            achievable_rounds=achievable_rounds,
+            expected_total_dates=total_dates,
+            expected_dates={
+                "males": CapacityAdvisor._spread(np.minimum(male_degrees, num_rounds), total_dates),
+                "females": CapacityAdvisor._spread(np.minimum(female_degrees, num_rounds), total_dates),
+            },
+            min_dates_needed=min_dates_needed,
+            short_of_dates=int(short_of_dates),
+            without_dates=int(np.count_nonzero(degrees == 0)),
+        )
+
+    @staticmethod
+    def _full_rounds(degrees: np.ndarray, num_tables: int) -> int:
+        """Largest r with sum(min(degrees, r)) >= num_tables * r."""
+        if num_tables <= 0 or not len(degrees):
+            return 0
+        ordered = np.sort(degrees)
+        rounds = np.arange(1, ordered[-1] + 1)
+        # sum(min(d, r)) = (sum of degrees below r) + r * (how many are >= r)
+        below = np.searchsorted(ordered, rounds)
+        prefix = np.concatenate([[0], np.cumsum(ordered)])
+        capacity = prefix[below] + rounds * (len(ordered) - below)
+        feasible = np.flatnonzero(capacity >= num_tables * rounds)
+        return int(rounds[feasible[-1]]) if len(feasible) else 0
+
+    @staticmethod
+    def _spread(limits: np.ndarray, total_dates: int) -> Dict[str, float]:
+        """
+        Dates per attendee when total_dates are handed out as evenly as
+        possible and nobody gets more than their limit (water-filling).
+        """
+        if not len(limits):
+            return {"min": 0, "mean": 0, "max": 0}
+        ordered = np.sort(limits).astype(float)
+        level = 0.0
+        remaining = float(total_dates)
+        for k, limit in enumerate(ordered):
+            # raising everyone still below limit up to it costs this much
+            cost = (limit - level) * (len(ordered) - k)
+            if cost >= remaining:
+                level += remaining / (len(ordered) - k)
+                break
+            remaining -= cost
+            level = limit
+        dates = np.minimum(ordered, level)
+        return {
+            "min": round(float(dates.min()), 1),
+            "mean": round(float(dates.mean()), 1),
+            "max": round(float(dates.max()), 1),
+        }
@@ -0,0 +1,89 @@
+from typing import List, Dict, Optional, Tuple
+from app.services.matching.models import Attendee
+from app.services.matching.matcher import SpeedDateMatcher
+from app.services.matching.history import PairHistory
+from app.services.matching.rules import MatchingRules
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class CompatibilityMatrix:
+    """
+    Works out who may meet whom. The event's MatchingRules compile into a
+    stack of males x females boolean tiers, instead of rescanning the
+    opposite-gender list for each attendee and tier. Tiers are tried in order
+    until an attendee has enough compatible dates.
+    """
+
+    @staticmethod
+    def find_all_potential_dates(
+        males: List[Attendee],
+        females: List[Attendee],
+        num_tables: int,
+        num_rounds: int,
+        rules: Optional[MatchingRules] = None,
+        pair_history: Optional[PairHistory] = None,
+    ) -> Tuple[Dict[int, List[Attendee]], Dict[int, Attendee]]:
+        logger.info(
+            "Finding potential dates (vectorized): %d males, %d females, %d tables, %d rounds",
+            len(males), len(females), num_tables, num_rounds,
+        )
+
+        male_mask, female_mask = CompatibilityMatrix.build_masks(
+            males, females, num_tables, num_rounds, rules, pair_history
+        )
+
+        all_compatible_dates = {}
+        id_to_user = {}
+        for i, male in enumerate(males):
+            all_compatible_dates[male.id] = [females[j] for j in np.flatnonzero(male_mask[i])]
+            id_to_user[male.id] = male
+        for j, female in enumerate(females):
+            all_compatible_dates[female.id] = [males[i] for i in np.flatnonzero(female_mask[j])]
+            id_to_user[female.id] = female
+
+        return (all_compatible_dates, id_to_user)
+
+    @staticmethod
+    def build_masks(
+        males: List[Attendee],
+        females: List[Attendee],
+        num_tables: int,
+        num_rounds: int,
+        rules: Optional[MatchingRules] = None,
+        pair_history: Optional[PairHistory] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (male_mask, female_mask) where male_mask[i, j] says whether
+        female j is in male i's compatible list and female_mask[j, i] says
+        whether male i is in female j's list. The two can differ because each
+        attendee relaxes tiers independently.
+
+        pair_history holds the pairs who met at earlier events.
+        """
+        met_before = pair_history.mask(males, females) if pair_history is not None else None
+        tiers = (rules or MatchingRules()).compile(males, females, met_before)  # (num_tiers, males, females)
+
+        male_tier = CompatibilityMatrix._select_tiers(
+            tiers.sum(axis=2),
+            SpeedDateMatcher.min_dates_threshold(num_tables, num_rounds, len(males)),
+        )
+        female_tier = CompatibilityMatrix._select_tiers(
+            tiers.sum(axis=1),
+            SpeedDateMatcher.min_dates_threshold(num_tables, num_rounds, len(females)),
+        )
+
+        male_mask = tiers[male_tier, np.arange(len(males)), :]
+        female_mask = tiers[female_tier, :, np.arange(len(females))]
+        return male_mask, female_mask
+
+    @staticmethod
+    def _select_tiers(counts: np.ndarray, min_dates_needed: int) -> np.ndarray:
+        """
+        counts has shape (num_tiers, attendees). Picks, per attendee, the first
+        tier with at least min_dates_needed dates, falling back to the last tier.
+        """
+        enough = counts[:-1] >= min_dates_needed
+        return np.where(enough.any(axis=0), enough.argmax(axis=0), counts.shape[0] - 1)
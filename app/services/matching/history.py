@@ -0,0 +1,51 @@
+from typing import Iterable, List, Tuple
+from app.services.matching.models import Attendee
+import hashlib
+import numpy as np
+
+
+class PairHistory:
+    """
+    Set of people who have met at earlier events. Each unordered pair is
+    stored as one int64 key, (min_id << 32) | max_id, in a sorted array, so
+    membership is a binary search and a whole males x females block is
+    checked with one vectorized np.searchsorted call.
+    """
+
+    def __init__(self, keys: np.ndarray):
+        self.keys = np.unique(keys.astype(np.int64))
+
+    @staticmethod
+    def from_pairs(pairs: Iterable[Tuple[int, int]]) -> "PairHistory":
+        pairs = np.array(list(pairs), dtype=np.int64).reshape(-1, 2)
+        return PairHistory(PairHistory._keys(pairs[:, 0], pairs[:, 1]))
+
+    @staticmethod
+    def _keys(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        return (np.minimum(a, b) << 32) | np.maximum(a, b)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def fingerprint(self) -> str:
+        """Stable digest of the stored pairs, for cache keys."""
+        return hashlib.sha1(self.keys.tobytes()).hexdigest()
+
+    def met_with(self, user_id: int, other_ids: List[int]) -> np.ndarray:
+        """Boolean array: whether user_id has met each of other_ids."""
+        others = np.array(other_ids, dtype=np.int64)
+        return self._contains(PairHistory._keys(np.int64(user_id), others))
+
+    def mask(self, males: List[Attendee], females: List[Attendee]) -> np.ndarray:
+        """males x females mask of pairs who have met before."""
+        if not len(self.keys) or not males or not females:
+            return np.zeros((len(males), len(females)), dtype=bool)
+        male_ids = np.fromiter((u.id for u in males), dtype=np.int64, count=len(males))
+        female_ids = np.fromiter((u.id for u in females), dtype=np.int64, count=len(females))
+        return self._contains(PairHistory._keys(male_ids[:, None], female_ids[None, :]))
+
+    def _contains(self, keys: np.ndarray) -> np.ndarray:
+        if not len(self.keys):
+            return np.zeros(keys.shape, dtype=bool)
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return self.keys[positions] == keys
@@ -1,84 +1,17 @@
-from typing import List, Dict, Tuple
-from app.models.user import User
-from app.models.enums import Gender
-from app.models.event_speed_date import EventSpeedDate
+from typing import Callable, List, Dict, Optional, Tuple
+from app.services.matching.history import PairHistory
+from app.services.matching.models import Attendee, Pairing
+from app.services.matching.tracing import ScheduleTrace
+import logging
 import math
-from flask import current_app
+
+logger = logging.getLogger(__name__)
 
 
 class SpeedDateMatcher:
-    @staticmethod
-    def find_all_potential_dates(
-        males: List[User],
-        females: List[User],
-        num_tables: int,
-        num_rounds: int,
-    ) -> Tuple[Dict[int, List[User]], Dict[int, User]]:
-        current_app.logger.info("\n\n=== Finding potential dates ===")
-        current_app.logger.info(f"Males: {len(males)}, Females: {len(females)}")
-        current_app.logger.info(f"Tables: {num_tables}, Rounds: {num_rounds}\n")
-
-        all_compatible_dates = {}
-        id_to_user = {}
-
-        # Initialize matches for all attendees
-        for attendee in males + females:
-            all_compatible_dates[attendee.id] = []
-            id_to_user[attendee.id] = attendee
-
-        # Find matches for each attendee
-        for attendee in males + females:
-            current_app.logger.info(f"\n--- Processing {attendee.first_name} {attendee.last_name} (ID: {attendee.id}) ---")
-            current_app.logger.info(f"Gender: {attendee.gender}, Age: {attendee.calculate_age()}")
-
-            all_opposite_gender = females if attendee.gender == Gender.MALE else males
-            current_app.logger.info(f"Total potential matches in opposite gender: {len(all_opposite_gender)}")
-
-            compatible_dates = [
-                potential_date for potential_date in all_opposite_gender
-                if (attendee.church_id is None or potential_date.church_id is None or attendee.church_id != potential_date.church_id)
-                    and (abs(attendee.calculate_age() - potential_date.calculate_age()) <= 3)
-            ]
-            current_app.logger.info(f"\nInitial len of compatible dates (age diff <= 3): {len(compatible_dates)}")
-
-            # If not enough matches, try extended age range
-            num_same_gender = (len(females) if attendee.gender == Gender.FEMALE else len(males))
-            min_dates_needed = SpeedDateMatcher.min_dates_threshold(num_tables, num_rounds, num_same_gender)
-            current_app.logger.info(f"\nMinimum dates needed: {min_dates_needed}")
-            current_app.logger.info(f"Current compatible dates: {len(compatible_dates)}")
-
-            if len(compatible_dates) < min_dates_needed:
-                current_app.logger.info("\nNot enough matches, trying extended age range (<= 4)")
-                compatible_dates = [
-                    potential_date for potential_date in all_opposite_gender
-                    if (attendee.church_id is None or potential_date.church_id is None or attendee.church_id != potential_date.church_id)
-                        and (abs(attendee.calculate_age() - potential_date.calculate_age()) <= 4)
-                ]
-                current_app.logger.info(f"New number of compatible dates with age <= 4: {len(compatible_dates)}")
-
-            if len(compatible_dates) < min_dates_needed:
-                current_app.logger.info("\nStill not enough matches, trying maximum age range (<= 5)")
-                compatible_dates = [
-                    potential_date for potential_date in all_opposite_gender
-                    if (attendee.church_id is None or potential_date.church_id is None or attendee.church_id != potential_date.church_id)
-                        and (abs(attendee.calculate_age() - potential_date.calculate_age()) <= 5)
-                ]
-                current_app.logger.info(f"New number of compatible dates with age <= 5: {len(compatible_dates)}")
-
-            if len(compatible_dates) < min_dates_needed:
-                current_app.logger.info("\nStill not enough matches, finding matches at same church")
-                compatible_dates = [
-                    potential_date for potential_date in all_opposite_gender
-                    if (abs(attendee.calculate_age() - potential_date.calculate_age()) <= 5)
-                ]
-                current_app.logger.info(f"Current compatible dates: {len(compatible_dates)}")
-
-            all_compatible_dates[attendee.id] = compatible_dates
-            current_app.logger.info(
-                f"\nFinal compatible dates for {attendee.first_name} {attendee.last_name}: {len(compatible_dates)}"
-            )
-
-        return (all_compatible_dates, id_to_user)
+    # Added to a pair's age difference when they met at an earlier event, so
+    # any new pair is tried before a repeat
+    PAST_PAIR_PENALTY = 1000
 
     @staticmethod
     def min_dates_threshold(num_tables, num_rounds, num_same_gender) -> int:
@@ -89,112 +22,179 @@ class SpeedDateMatcher:
 
     @staticmethod
     def finalize_all_rounds(
-        all_compatible_dates: Dict[int, List[User]],
-        id_to_user: Dict[int, User],
-        event_id: int,
+        all_compatible_dates: Dict[int, List[Attendee]],
+        id_to_user: Dict[int, Attendee],
         num_tables: int,
         num_rounds: int,
-    ) -> List[EventSpeedDate]:
-        current_app.logger.info(f"\n\n\n=== Starting schedule generation for event {event_id} ===")
-        current_app.logger.info(f"Requested rounds: {num_rounds}, Tables: {num_tables}")
-        current_app.logger.info(f"Total attendees: {len(all_compatible_dates)}\n\n\n")
-
-        event_speed_dates: List[EventSpeedDate] = []
-        rounds_completed_per_attendee: Dict[int, int] = { # initialize with 0 for each attendee id
-            k: 0 for k,_ in all_compatible_dates.items()
+        on_round: Optional[Callable[[int, int], None]] = None,
+        rounds_completed: Optional[Dict[int, int]] = None,
+        previous_tables: Optional[Dict[int, int]] = None,
+        pair_history: Optional[PairHistory] = None,
+        trace: Optional[ScheduleTrace] = None,
+    ) -> List[Pairing]:
+        """
+        Seats every round greedily. on_round, if given, is called with
+        (round_number, tables_filled) after each round so callers can report
+        progress.
+
+        rounds_completed and previous_tables ({user_id: table}) carry state over
+        from rounds that were already played when only the remaining rounds are
+        being rebuilt. Pairs in pair_history are penalized by PAST_PAIR_PENALTY.
+        Seating decisions are recorded in trace when one is given.
+        """
+        logger.info(
+            "Starting greedy schedule generation: %d attendees, %d tables, %d rounds",
+            len(all_compatible_dates), num_tables, num_rounds,
+        )
+        if trace is not None:
+            trace.record(("start", "greedy", len(all_compatible_dates), num_tables, num_rounds))
+
+        event_speed_dates: List[Pairing] = []
+
+        # Attendees are numbered once so "compatible and not met yet" and
+        # "seated this round" are integer bitsets: bit j of not_met[i] is set
+        # while attendee j is still a candidate for attendee i.
+        attendee_ids = list(all_compatible_dates)
+        attendee_index = {user_id: i for i, user_id in enumerate(attendee_ids)}
+        ages = [id_to_user[user_id].age for user_id in attendee_ids]
+        not_met = [0] * len(attendee_ids)
+        num_not_met = [0] * len(attendee_ids)
+        # Each attendee's candidates are sorted by cost (age difference plus any
+        # past-pair penalty) once, keeping compatible-list order for equal costs,
+        # with the costs alongside so seating never recomputes or re-sorts them.
+        candidates: List[List[int]] = []
+        pair_costs: List[List[int]] = []
+        for i, user_id in enumerate(attendee_ids):
+            partners = [attendee_index[user.id] for user in all_compatible_dates[user_id]]
+            for j in partners:
+                not_met[i] |= 1 << j
+            num_not_met[i] = len(partners)
+            costs = [abs(ages[j] - ages[i]) for j in partners]
+            if pair_history is not None and len(pair_history):
+                met_before = pair_history.met_with(user_id, [attendee_ids[j] for j in partners])
+                costs = [cost + SpeedDateMatcher.PAST_PAIR_PENALTY * bool(met) for cost, met in zip(costs, met_before)]
+            order = sorted(range(len(partners)), key=costs.__getitem__)
+            candidates.append([partners[k] for k in order])
+            pair_costs.append([costs[k] for k in order])
+
+        rounds_completed_per_attendee = [
+            (rounds_completed or {}).get(user_id, 0) for user_id in attendee_ids
+        ]
+        # user_id -> (seating order, table) for the previous round, so finding a
+        # pair's old table doesn't scan every speed date created so far
+        previous_round_tables: Dict[int, Tuple[int, int]] = {
+            user_id: (seating_order, table_number)
+            for seating_order, (user_id, table_number) in enumerate((previous_tables or {}).items())
         }
 
         for current_round in range(1, num_rounds + 1):
-            current_app.logger.info("\n---\nFilling up all tables for ROUND %d\n---\n\n", current_round)
-            current_app.logger.info(f"Tables to fill: {num_tables}")
-
-            # Sort attendees by least number of rounds participated in then by least potential dates
-            sorted_attendees = sorted(
-                all_compatible_dates,
-                key=lambda user_id: (rounds_completed_per_attendee[user_id], len(all_compatible_dates[user_id]),)
-            )
-            attendees_seated_this_round = set()
-            tables_available_this_round = [table_number for table_number in range(1, num_tables + 1)]
-            
-            for attendee_id in sorted_attendees:
-                attendee = id_to_user[attendee_id]
-                if attendee_id in attendees_seated_this_round:
-                    current_app.logger.info(f"User {attendee_id} ({attendee.first_name} {attendee.last_name}) already seated this round, skipping")
+            # Order attendees by least number of rounds participated in then by least potential
+            # dates. Both are small integers, so a bucket per (rounds, potential dates) key
+            # replaces a comparison sort; each bucket stays in attendee order.
+            buckets: Dict[Tuple[int, int], List[int]] = {}
+            for i in range(len(attendee_ids)):
+                buckets.setdefault((rounds_completed_per_attendee[i], num_not_met[i]), []).append(i)
+            sorted_attendees = [i for key in sorted(buckets) for i in buckets[key]]
+            # nobody can have fewer rounds than the least-seated attendee at the start of the round
+            fewest_rounds = min(rounds_completed_per_attendee, default=0)
+            seated_this_round = 0
+            tables_available_this_round = set(range(1, num_tables + 1))
+            next_free_table = 1  # tables are only taken during a round, so the lowest free one only moves up
+            current_round_tables: Dict[int, Tuple[int, int]] = {}
+
+            for i in sorted_attendees:
+                attendee_id = attendee_ids[i]
+                if seated_this_round >> i & 1:
                     continue
 
-                current_app.logger.info(f"\nTrying to seat User {attendee_id} ({attendee.first_name} {attendee.last_name})")
-
-                # sort this attendee's compatible dates by fewest rounds participated in then by age difference
-                sorted_compatible_dates = sorted(
-                    all_compatible_dates[attendee_id],
-                    key=lambda user: (rounds_completed_per_attendee[user.id], abs(user.calculate_age() - attendee.calculate_age()),),
-                )
-
-                for compatible_date in sorted_compatible_dates:
-                    if compatible_date.id not in attendees_seated_this_round:
-                        male_id = attendee_id if attendee.gender == Gender.MALE else compatible_date.id
-                        female_id = attendee_id if attendee.gender == Gender.FEMALE else compatible_date.id
-
-                        # set attendee and compatible_date to have a table this round.
-                        previous_tables = [
-                            esd.table_number for esd in event_speed_dates
-                            if esd.round_number == current_round - 1 and (esd.female_id == female_id or esd.male_id == male_id) and esd.table_number in tables_available_this_round
-                        ]
-                        previous_table = previous_tables[0] if previous_tables else None
-                        if previous_table:
-                            table_number = previous_table
-                            current_app.logger.info(f"Reusing previous table {previous_table}")
-                            tables_available_this_round.remove(previous_table)
-                        else:
-                            table_number = tables_available_this_round.pop(0)
-                        SpeedDateMatcher.assign_table(event_speed_dates, event_id, male_id, female_id, table_number, current_round)
-
-                        male_user = id_to_user[male_id]
-                        female_user = id_to_user[female_id]
-                        current_app.logger.info(
-                            f"\nAssigned table {table_number} for round {current_round}:"
-                            f"\n  Male: {male_user.first_name} {male_user.last_name} (ID: {male_id})"
-                            f"\n  Female: {female_user.first_name} {female_user.last_name} (ID: {female_id})"
-                        )
-
-                        # track that both these people are now in the current round
-                        attendees_seated_this_round.update([attendee_id, compatible_date.id])
-                        rounds_completed_per_attendee[attendee_id] += 1
-                        rounds_completed_per_attendee[compatible_date.id] += 1
-
-                        # remove each other from their compatible dates list
-                        if compatible_date in all_compatible_dates[attendee_id]:
-                            all_compatible_dates[attendee_id].remove(compatible_date)
-                        if attendee in all_compatible_dates[compatible_date.id]:
-                            all_compatible_dates[compatible_date.id].remove(attendee)
-
-                        current_app.logger.info(f"\nMale {male_id} with Female {female_id} for Round {current_round} at Table {table_number}")
-                        current_app.logger.info(f"\n{id_to_user[male_id]}{id_to_user[female_id]}")
-                        current_app.logger.info(f"tables now available this round {tables_available_this_round}")
-                        current_app.logger.info(f"Rounds per user id:\n {sorted(rounds_completed_per_attendee.items(), key=lambda item: item[1])}\n")
-
-                        break  # this compatible date has a date this round. moving on to next...
+                # pick the unseated compatible date with the fewest rounds participated in then
+                # the lowest cost; ties go to whoever comes first in the compatible list.
+                # Candidates are scanned by cost, so the first one on fewest_rounds wins.
+                available = not_met[i] & ~seated_this_round
+                if available:
+                    j, best = None, None
+                    for candidate, cost in zip(candidates[i], pair_costs[i]):
+                        if not available >> candidate & 1:
+                            continue
+                        if rounds_completed_per_attendee[candidate] == fewest_rounds:
+                            j = candidate
+                            break
+                        if best is None or (rounds_completed_per_attendee[candidate], cost) < best:
+                            j, best = candidate, (rounds_completed_per_attendee[candidate], cost)
+                    compatible_date_id = attendee_ids[j]
+                    male_id = attendee_id if id_to_user[attendee_id].is_male else compatible_date_id
+                    female_id = compatible_date_id if id_to_user[attendee_id].is_male else attendee_id
+
+                    # set attendee and compatible_date to have a table this round.
+                    # if both sat somewhere last round, the one seated first keeps priority
+                    last_tables = sorted(
+                        previous_round_tables[user_id] for user_id in (male_id, female_id)
+                        if user_id in previous_round_tables and previous_round_tables[user_id][1] in tables_available_this_round
+                    )
+                    previous_table = last_tables[0][1] if last_tables else None
+                    if previous_table:
+                        table_number = previous_table
+                    else:
+                        while next_free_table not in tables_available_this_round:
+                            next_free_table += 1
+                        table_number = next_free_table
+                    tables_available_this_round.discard(table_number)
+                    seating_order = len(current_round_tables)
+                    current_round_tables[male_id] = (seating_order, table_number)
+                    current_round_tables[female_id] = (seating_order, table_number)
+                    SpeedDateMatcher.assign_table(event_speed_dates, male_id, female_id, table_number, current_round)
+                    if trace is not None:
+                        trace.record(("seat", current_round, table_number, male_id, female_id, bool(previous_table)))
+
+                    # track that both these people are now in the current round
+                    seated_this_round |= (1 << i) | (1 << j)
+                    rounds_completed_per_attendee[i] += 1
+                    rounds_completed_per_attendee[j] += 1
+
+                    # remove each other from their compatible dates
+                    if not_met[i] >> j & 1:
+                        not_met[i] &= ~(1 << j)
+                        num_not_met[i] -= 1
+                    if not_met[j] >> i & 1:
+                        not_met[j] &= ~(1 << i)
+                        num_not_met[j] -= 1
+                elif trace is not None:
+                    trace.record(("no_partner", current_round, attendee_id))
 
                 if len(tables_available_this_round) == 0:
-                    current_app.logger.info("All tables are filled for ROUND %d\n\n", current_round)
                     break
-                
+
+            previous_round_tables = current_round_tables
+            tables_filled = num_tables - len(tables_available_this_round)
+            logger.debug("Round %d: filled %d of %d tables", current_round, tables_filled, num_tables)
+            if trace is not None:
+                trace.record(("round_end", current_round, tables_filled))
+            if on_round:
+                on_round(current_round, tables_filled)
+
         return event_speed_dates
 
     @staticmethod
     def assign_table(
-        event_speed_dates: List[EventSpeedDate],
-        event_id: int,
+        event_speed_dates: List[Pairing],
         male_id: int,
         female_id: int,
         table_number: int,
         round_number: int,
     ):
-        event_speed_date = EventSpeedDate(
-            event_id=event_id,
-            male_id=male_id,
-            female_id=female_id,
-            table_number=table_number,
-            round_number=round_number,
-        )
-        event_speed_dates.append(event_speed_date)
+        event_speed_dates.append(Pairing(male_id, female_id, table_number, round_number))
+
+    @staticmethod
+    def assign_round_tables(pairs, previous_tables: Dict[int, int], num_tables: int) -> List[int]:
+        """Keeps a pair at the male's or female's previous table when it is still free."""
+        free_tables = set(range(1, num_tables + 1))
+        tables = [None] * len(pairs)
+        for i, (male_id, female_id) in enumerate(pairs):
+            for uid in (female_id, male_id):
+                table_number = previous_tables.get(uid)
+                if table_number in free_tables:
+                    tables[i] = table_number
+                    free_tables.discard(table_number)
+                    break
+        remaining = iter(sorted(free_tables))
+        return [table_number if table_number is not None else next(remaining) for table_number in tables]
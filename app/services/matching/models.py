@@ -0,0 +1,21 @@
+from typing import NamedTuple, Optional
+
+# Plain tuples shared by the matching engines. They carry only what scheduling
+# needs and have no Flask or SQLAlchemy dependencies, so the engines can run in
+# worker processes, benchmarks and scripts without an app context. The service
+# layer converts User rows to Attendee and Pairing to EventSpeedDate.
+
+
+class Attendee(NamedTuple):
+    id: int
+    is_male: bool
+    age: int
+    church_id: Optional[int] = None
+    denomination_id: Optional[int] = None
+
+
+class Pairing(NamedTuple):
+    male_id: int
+    female_id: int
+    table_number: int
+    round_number: int
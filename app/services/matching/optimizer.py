@@ -0,0 +1,223 @@
+import logging
+import random
+import time
+from typing import List, Dict, Optional, Set, Tuple
+from app.services.matching.models import Attendee, Pairing
+from app.services.matching.matcher import SpeedDateMatcher
+from app.services.matching.history import PairHistory
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduleOptimizer:
+    """
+    Anytime local search over a finished schedule.
+
+    Starting from the output of a round builder, random moves are applied until
+    the wall-clock budget runs out, keeping any move that does not make the
+    schedule worse. Because only non-worsening moves are kept, the current
+    schedule is always the best one found so far and can be returned as soon
+    as the deadline passes.
+
+    Moves:
+      - partner swap: (m1, f1), (m2, f2) -> (m1, f2), (m2, f1) within a round
+      - round swap: a pair in one round trades places with a pair in another;
+        the cost is unchanged, but it frees different people in each round
+        for the moves above
+      - substitution: replace one side of a pair with someone sitting out that round
+      - fill: seat two people who are sitting out at a free table
+
+    Tables are reassigned once at the end so pairs keep the previous round's
+    table where possible.
+    """
+
+    # Cost = FILL_WEIGHT * -dates + FAIRNESS_WEIGHT * sum(dates per attendee ^ 2)
+    #        + AGE_WEIGHT * sum(age difference per date)
+    #        + SpeedDateMatcher.PAST_PAIR_PENALTY * (dates between pairs in pair_history)
+    # With the number of dates fixed, the sum of squares is smallest when dates
+    # are spread evenly across attendees.
+    FILL_WEIGHT = 1000
+    FAIRNESS_WEIGHT = 3
+    AGE_WEIGHT = 1
+
+    @staticmethod
+    def compatible_pairs(
+        all_compatible_dates: Dict[int, List[Attendee]], id_to_user: Dict[int, Attendee]
+    ) -> Set[Tuple[int, int]]:
+        """(male_id, female_id) pairs allowed to meet."""
+        pairs = set()
+        for uid, compatible_dates in all_compatible_dates.items():
+            for partner in compatible_dates:
+                if id_to_user[uid].is_male:
+                    pairs.add((uid, partner.id))
+                else:
+                    pairs.add((partner.id, uid))
+        return pairs
+
+    @staticmethod
+    def optimize(
+        speed_dates: List[Pairing],
+        compatible_pairs: Set[Tuple[int, int]],
+        id_to_user: Dict[int, Attendee],
+        num_tables: int,
+        time_budget_ms: int,
+        seed: int = 0,
+        pair_history: Optional[PairHistory] = None,
+    ) -> List[Pairing]:
+        deadline = time.perf_counter() + time_budget_ms / 1000
+        rng = random.Random(seed)
+
+        males = [uid for uid, attendee in id_to_user.items() if attendee.is_male]
+        females = [uid for uid, attendee in id_to_user.items() if not attendee.is_male]
+        ages = {uid: attendee.age for uid, attendee in id_to_user.items()}
+        met_before: Set[Tuple[int, int]] = set()
+        if pair_history is not None and len(pair_history):
+            mask = pair_history.mask([id_to_user[uid] for uid in males], [id_to_user[uid] for uid in females])
+            met_before = {(males[i], females[j]) for i, j in zip(*mask.nonzero())}
+
+        num_rounds = max((esd.round_number for esd in speed_dates), default=0)
+        rounds: List[List[List[int]]] = [[] for _ in range(num_rounds)]
+        for esd in sorted(speed_dates, key=lambda esd: (esd.round_number, esd.table_number)):
+            rounds[esd.round_number - 1].append([esd.male_id, esd.female_id])
+        if not rounds:
+            return speed_dates
+
+        seated = [set(uid for pair in pairs for uid in pair) for pairs in rounds]
+        met = set(tuple(pair) for pairs in rounds for pair in pairs)
+        dates_per_attendee = {uid: 0 for uid in id_to_user}
+        for pairs in rounds:
+            for male_id, female_id in pairs:
+                dates_per_attendee[male_id] += 1
+                dates_per_attendee[female_id] += 1
+
+        def can_meet(male_id, female_id):
+            return (male_id, female_id) in compatible_pairs and (male_id, female_id) not in met
+
+        def age_gap(male_id, female_id):
+            return abs(ages[male_id] - ages[female_id])
+
+        def pair_cost(male_id, female_id):
+            return ScheduleOptimizer.AGE_WEIGHT * age_gap(male_id, female_id) + SpeedDateMatcher.PAST_PAIR_PENALTY * (
+                (male_id, female_id) in met_before
+            )
+
+        def fairness_delta(removed_id, added_id):
+            # Change in sum of squares when one date moves from removed_id to added_id.
+            return 2 * (dates_per_attendee[added_id] - dates_per_attendee[removed_id]) + 2
+
+        def try_partner_swap():
+            pairs = rounds[rng.randrange(num_rounds)]
+            if len(pairs) < 2:
+                return False
+            a, b = rng.sample(range(len(pairs)), 2)
+            (m1, f1), (m2, f2) = pairs[a], pairs[b]
+            if not (can_meet(m1, f2) and can_meet(m2, f1)):
+                return False
+            delta = pair_cost(m1, f2) + pair_cost(m2, f1) - pair_cost(m1, f1) - pair_cost(m2, f2)
+            if delta > 0:
+                return False
+            met.difference_update([(m1, f1), (m2, f2)])
+            met.update([(m1, f2), (m2, f1)])
+            pairs[a], pairs[b] = [m1, f2], [m2, f1]
+            return delta < 0
+
+        def try_round_swap():
+            if num_rounds < 2:
+                return False
+            r1, r2 = rng.sample(range(num_rounds), 2)
+            if not rounds[r1] or not rounds[r2]:
+                return False
+            a = rng.randrange(len(rounds[r1]))
+            b = rng.randrange(len(rounds[r2]))
+            pair_a, pair_b = set(rounds[r1][a]), set(rounds[r2][b])
+            # nobody may end up seated twice in a round
+            if (seated[r2] - pair_b) & pair_a or (seated[r1] - pair_a) & pair_b:
+                return False
+            seated[r1] = (seated[r1] - pair_a) | pair_b
+            seated[r2] = (seated[r2] - pair_b) | pair_a
+            rounds[r1][a], rounds[r2][b] = rounds[r2][b], rounds[r1][a]
+            return False
+
+        def try_substitution():
+            r = rng.randrange(num_rounds)
+            pairs = rounds[r]
+            if not pairs:
+                return False
+            index = rng.randrange(len(pairs))
+            male_id, female_id = pairs[index]
+            replace_male = rng.random() < 0.5
+            candidate = rng.choice(males if replace_male else females)
+            if candidate in seated[r]:
+                return False
+            new_pair = (candidate, female_id) if replace_male else (male_id, candidate)
+            if not can_meet(*new_pair):
+                return False
+            removed = male_id if replace_male else female_id
+            delta = ScheduleOptimizer.FAIRNESS_WEIGHT * fairness_delta(removed, candidate)
+            delta += pair_cost(*new_pair) - pair_cost(male_id, female_id)
+            if delta > 0:
+                return False
+            met.discard((male_id, female_id))
+            met.add(new_pair)
+            seated[r].discard(removed)
+            seated[r].add(candidate)
+            dates_per_attendee[removed] -= 1
+            dates_per_attendee[candidate] += 1
+            pairs[index] = list(new_pair)
+            return delta < 0
+
+        def try_fill():
+            r = rng.randrange(num_rounds)
+            if len(rounds[r]) >= num_tables:
+                return False
+            male_id = rng.choice(males)
+            if male_id in seated[r]:
+                return False
+            # One more date: -FILL_WEIGHT, plus the sum-of-squares growth on
+            # both sides and the new pair's own cost.
+            male_delta = ScheduleOptimizer.FAIRNESS_WEIGHT * (2 * dates_per_attendee[male_id] + 1)
+            deltas = [
+                (
+                    -ScheduleOptimizer.FILL_WEIGHT
+                    + male_delta
+                    + ScheduleOptimizer.FAIRNESS_WEIGHT * (2 * dates_per_attendee[f] + 1)
+                    + pair_cost(male_id, f),
+                    f,
+                )
+                for f in females
+                if f not in seated[r] and can_meet(male_id, f)
+            ]
+            if not deltas:
+                return False
+            delta, female_id = min(deltas, key=lambda entry: entry[0])
+            if delta > 0:
+                return False
+            met.add((male_id, female_id))
+            seated[r].update([male_id, female_id])
+            dates_per_attendee[male_id] += 1
+            dates_per_attendee[female_id] += 1
+            rounds[r].append([male_id, female_id])
+            return delta < 0
+
+        moves = (try_partner_swap, try_round_swap, try_substitution, try_fill)
+        iterations = 0
+        improvements = 0
+        while time.perf_counter() < deadline:
+            iterations += 1
+            if rng.choice(moves)():
+                improvements += 1
+
+        logger.info(
+            f"Schedule optimizer: {iterations} moves tried, {improvements} improvements in {time_budget_ms}ms"
+        )
+
+        optimized: List[Pairing] = []
+        previous_tables: Dict[int, int] = {}
+        for round_number, pairs in enumerate(rounds, start=1):
+            tables = SpeedDateMatcher.assign_round_tables(pairs, previous_tables, num_tables)
+            previous_tables = {}
+            for (male_id, female_id), table_number in zip(pairs, tables):
+                SpeedDateMatcher.assign_table(optimized, male_id, female_id, table_number, round_number)
+                previous_tables[male_id] = table_number
+                previous_tables[female_id] = table_number
+        return optimized
@@ -0,0 +1,14 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+
+def process_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Process pool for CPU-bound matching work. Workers come from a forkserver
+    (or spawn where that isn't available) rather than a plain fork: the web
+    process already runs request and schedule job threads, and forking it can
+    copy a lock one of them holds into a child that then waits on it forever.
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method))
@@ -0,0 +1,137 @@
+import logging
+import os
+import random
+from concurrent.futures import as_completed
+from typing import Callable, List, NamedTuple, Optional, Tuple
+from app.services.matching.models import Attendee, Pairing
+from app.services.matching.matcher import SpeedDateMatcher
+from app.services.matching.compatibility import CompatibilityMatrix
+from app.services.matching.bipartite import BipartiteRoundBuilder
+from app.services.matching.history import PairHistory
+from app.services.matching.pool import process_pool
+from app.services.matching.rules import MatchingRules
+
+logger = logging.getLogger(__name__)
+
+ROUND_BUILDERS = {
+    "greedy": SpeedDateMatcher.finalize_all_rounds,
+    "matching": BipartiteRoundBuilder.finalize_all_rounds,
+}
+
+
+class ScheduleScore(NamedTuple):
+    num_dates: int
+    full_rounds: int
+    min_dates: int
+    max_dates: int
+    total_age_gap: int
+
+    def sort_key(self):
+        """Lower is better: most dates, then the evenest spread, then smallest age gaps."""
+        return (-self.num_dates, self.max_dates - self.min_dates, -self.min_dates, self.total_age_gap)
+
+
+class SchedulePortfolio:
+    """
+    Runs several round builders and shuffled tie-breaks in a process pool and
+    keeps the best-scoring schedule. Candidates are (builder name, seed)
+    pairs; seed None keeps the attendees in their given order.
+
+    Candidates seat all their rounds in a worker, so on_round is called as
+    candidates finish instead, with the share done scaled to num_rounds.
+    """
+
+    SHUFFLED_SEEDS = (1, 2, 3)
+
+    @staticmethod
+    def candidates() -> List[Tuple[str, Optional[int]]]:
+        return [(name, None) for name in ROUND_BUILDERS] + [
+            (name, seed) for seed in SchedulePortfolio.SHUFFLED_SEEDS for name in ROUND_BUILDERS
+        ]
+
+    @staticmethod
+    def run(
+        males: List[Attendee],
+        females: List[Attendee],
+        num_tables: int,
+        num_rounds: int,
+        max_workers: Optional[int] = None,
+        rules: Optional[MatchingRules] = None,
+        pair_history: Optional[PairHistory] = None,
+        on_round: Optional[Callable[[int, int], None]] = None,
+    ) -> Tuple[List[Pairing], Tuple[str, Optional[int]], ScheduleScore]:
+        candidates = SchedulePortfolio.candidates()
+        max_workers = max_workers or min(len(candidates), os.cpu_count() or 1)
+
+        results = []
+        with process_pool(max_workers) as executor:
+            futures = {
+                executor.submit(
+                    SchedulePortfolio.run_candidate,
+                    candidate, males, females, num_tables, num_rounds, rules, pair_history,
+                ): index
+                for index, candidate in enumerate(candidates)
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                index = futures[future]
+                candidate = candidates[index]
+                if on_round and num_rounds * done // len(candidates) > num_rounds * (done - 1) // len(candidates):
+                    on_round(num_rounds * done // len(candidates), num_tables)
+                try:
+                    pairings = future.result()
+                except Exception as e:
+                    logger.error("Portfolio candidate %s failed: %s", candidate, e)
+                    continue
+                score = SchedulePortfolio.score(pairings, males + females, num_tables)
+                logger.info("Portfolio candidate %s: %s", candidate, score)
+                # index breaks score ties in candidate order, whatever order they finish in
+                results.append((score.sort_key(), index, pairings, candidate, score))
+
+        if not results:
+            raise RuntimeError("Every portfolio candidate failed")
+        _, _, pairings, candidate, score = min(results)
+        logger.info("Portfolio winner %s: %s", candidate, score)
+        return pairings, candidate, score
+
+    @staticmethod
+    def run_candidate(
+        candidate: Tuple[str, Optional[int]],
+        males: List[Attendee],
+        females: List[Attendee],
+        num_tables: int,
+        num_rounds: int,
+        rules: Optional[MatchingRules] = None,
+        pair_history: Optional[PairHistory] = None,
+    ) -> List[Pairing]:
+        builder, seed = candidate
+        if seed is not None:
+            rng = random.Random(seed)
+            males, females = list(males), list(females)
+            rng.shuffle(males)
+            rng.shuffle(females)
+        compatible_dates, id_to_user = CompatibilityMatrix.find_all_potential_dates(
+            males, females, num_tables, num_rounds, rules, pair_history
+        )
+        return ROUND_BUILDERS[builder](
+            compatible_dates, id_to_user, num_tables, num_rounds, pair_history=pair_history
+        )
+
+    @staticmethod
+    def score(pairings: List[Pairing], attendees: List[Attendee], num_tables: int) -> ScheduleScore:
+        ages = {attendee.id: attendee.age for attendee in attendees}
+        dates_per_attendee = {attendee.id: 0 for attendee in attendees}
+        dates_per_round = {}
+        total_age_gap = 0
+        for pairing in pairings:
+            dates_per_attendee[pairing.male_id] += 1
+            dates_per_attendee[pairing.female_id] += 1
+            dates_per_round[pairing.round_number] = dates_per_round.get(pairing.round_number, 0) + 1
+            total_age_gap += abs(ages[pairing.male_id] - ages[pairing.female_id])
+        counts = dates_per_attendee.values()
+        return ScheduleScore(
+            num_dates=len(pairings),
+            full_rounds=sum(1 for filled in dates_per_round.values() if filled >= num_tables),
+            min_dates=min(counts, default=0),
+            max_dates=max(counts, default=0),
+            total_age_gap=total_age_gap,
+        )
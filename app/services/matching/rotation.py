@@ -0,0 +1,92 @@
+from typing import Callable, List, Dict, Optional
+from app.services.matching.models import Attendee, Pairing
+from app.services.matching.tracing import ScheduleTrace
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class RotationTemplate:
+    """
+    Closed-form schedule for balanced events: the smaller gender keeps one
+    table all night and the larger gender rotates one seat per round, like a
+    cyclic round-robin. With both sides sorted by age, rotation shift s pairs
+    the i-th youngest of the smaller side with the (i + s)-th youngest of the
+    larger side, wrapping around. Different shifts never repeat a pair.
+
+    A shift is usable when every pair it creates is in the compatible lists
+    from find_all_potential_dates. If there are fewer usable shifts than
+    rounds, build returns None and the caller should fall back to a general
+    round builder.
+    """
+
+    # The larger side may have at most this share of extra attendees (and at
+    # least one); they take turns sitting out as the rotation passes them.
+    MAX_IMBALANCE = 0.1
+
+    @staticmethod
+    def build(
+        all_compatible_dates: Dict[int, List[Attendee]],
+        id_to_user: Dict[int, Attendee],
+        num_tables: int,
+        num_rounds: int,
+        on_round: Optional[Callable[[int, int], None]] = None,
+        trace: Optional[ScheduleTrace] = None,
+    ) -> Optional[List[Pairing]]:
+        males = [id_to_user[uid] for uid in all_compatible_dates if id_to_user[uid].is_male]
+        females = [id_to_user[uid] for uid in all_compatible_dates if not id_to_user[uid].is_male]
+        seated, rotating = (males, females) if len(males) <= len(females) else (females, males)
+        num_seated, num_rotating = len(seated), len(rotating)
+
+        if num_seated == 0 or num_tables < num_seated or num_rounds > num_rotating:
+            return None
+        if num_rotating - num_seated > max(1, int(num_seated * RotationTemplate.MAX_IMBALANCE)):
+            return None
+
+        seated = sorted(seated, key=lambda user: (user.age, user.id))
+        rotating = sorted(rotating, key=lambda user: (user.age, user.id))
+        seated_index = {user.id: i for i, user in enumerate(seated)}
+        rotating_index = {user.id: p for p, user in enumerate(rotating)}
+
+        # A pair can meet if either side has the other in their compatible
+        # list, which is what the round builders allow as well.
+        compatible = np.zeros((num_seated, num_rotating), dtype=bool)
+        for uid, compatible_dates in all_compatible_dates.items():
+            for partner in compatible_dates:
+                if uid in seated_index and partner.id in rotating_index:
+                    compatible[seated_index[uid], rotating_index[partner.id]] = True
+                elif uid in rotating_index and partner.id in seated_index:
+                    compatible[seated_index[partner.id], rotating_index[uid]] = True
+
+        # partners[s, i] is who seat i faces under shift s
+        seats = np.arange(num_seated)
+        partners = (seats[None, :] + np.arange(num_rotating)[:, None]) % num_rotating
+        usable = compatible[seats[None, :], partners].all(axis=1)
+        if usable.sum() < num_rounds:
+            logger.info("Rotation template has %d usable shifts for %d rounds, not using it", usable.sum(), num_rounds)
+            return None
+
+        # Prefer the shifts with the smallest total age gap
+        seated_ages = np.array([user.age for user in seated])
+        rotating_ages = np.array([user.age for user in rotating])
+        age_gaps = np.abs(seated_ages[None, :] - rotating_ages[partners]).sum(axis=1)
+        shifts = sorted(np.flatnonzero(usable), key=lambda s: (age_gaps[s], s))[:num_rounds]
+
+        logger.info("Using rotation template: %d tables, shifts %s", num_seated, shifts)
+        if trace is not None:
+            trace.record(("start", "rotation", len(all_compatible_dates), num_tables, num_rounds))
+        event_speed_dates: List[Pairing] = []
+        for round_number, shift in enumerate(shifts, start=1):
+            for i, p in enumerate(partners[shift]):
+                seated_user, rotating_user = seated[i], rotating[p]
+                male, female = (seated_user, rotating_user) if seated_user.is_male else (rotating_user, seated_user)
+                event_speed_dates.append(Pairing(male.id, female.id, i + 1, round_number))
+                if trace is not None:
+                    # the smaller side never leaves its table
+                    trace.record(("seat", round_number, i + 1, male.id, female.id, round_number > 1))
+            if trace is not None:
+                trace.record(("round_end", round_number, num_seated))
+            if on_round:
+                on_round(round_number, num_seated)
+        return event_speed_dates
@@ -0,0 +1,111 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from app.services.matching.models import Attendee
+import numpy as np
+
+
+class MatchingRules(NamedTuple):
+    """
+    Per-event compatibility rules, stored as JSON in events.matching_rules.
+
+    compile() turns them into a stack of males x females boolean tiers,
+    strictest first; CompatibilityMatrix gives every attendee the first tier
+    with enough dates. The defaults reproduce the original matcher: different
+    church with age gap <= 3, then 4, then 5, then age gap <= 5 at any church.
+    """
+
+    # Allowed age gaps, tried in order
+    age_tiers: Tuple[int, ...] = (3, 4, 5)
+    # Keep people from the same church apart until the last tier
+    exclude_same_church: bool = True
+    # Try people of the same denomination first within each age tier
+    prefer_same_denomination: bool = False
+    # Never pair people who met at a past event
+    avoid_past_pairs: bool = False
+    # Seat people who haven't met at a past event before those who have
+    prefer_new_pairs: bool = False
+
+    MAX_AGE_TIERS = 5
+
+    @staticmethod
+    def from_dict(data: Optional[Dict[str, Any]]) -> "MatchingRules":
+        """Builds rules from stored/request JSON, raising ValueError on bad input."""
+        if not data:
+            return MatchingRules()
+        if not isinstance(data, dict):
+            raise ValueError("matching_rules must be an object")
+        unknown = set(data) - set(MatchingRules._fields)
+        if unknown:
+            raise ValueError(f"Unknown matching rules: {', '.join(sorted(unknown))}")
+
+        values = {}
+        if "age_tiers" in data:
+            age_tiers = data["age_tiers"]
+            if (
+                not isinstance(age_tiers, list)
+                or not 1 <= len(age_tiers) <= MatchingRules.MAX_AGE_TIERS
+                or not all(isinstance(gap, int) and not isinstance(gap, bool) and gap >= 0 for gap in age_tiers)
+                or any(a >= b for a, b in zip(age_tiers, age_tiers[1:]))
+            ):
+                raise ValueError(
+                    f"age_tiers must be 1 to {MatchingRules.MAX_AGE_TIERS} increasing non-negative integers"
+                )
+            values["age_tiers"] = tuple(age_tiers)
+        for field in ("exclude_same_church", "prefer_same_denomination", "avoid_past_pairs", "prefer_new_pairs"):
+            if field in data:
+                if not isinstance(data[field], bool):
+                    raise ValueError(f"{field} must be true or false")
+                values[field] = data[field]
+        return MatchingRules(**values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**self._asdict(), "age_tiers": list(self.age_tiers)}
+
+    def compile(
+        self,
+        males: List[Attendee],
+        females: List[Attendee],
+        met_before: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Returns the (num_tiers, males, females) tier stack. met_before is a
+        males x females mask of pairs who met at past events; with
+        avoid_past_pairs those pairs are left out of every tier.
+        """
+        male_ages = np.fromiter((u.age for u in males), dtype=np.int32, count=len(males))
+        female_ages = np.fromiter((u.age for u in females), dtype=np.int32, count=len(females))
+        age_diff = np.abs(male_ages[:, None] - female_ages[None, :])
+
+        allowed = np.ones((len(males), len(females)), dtype=bool)
+        if self.avoid_past_pairs and met_before is not None:
+            allowed &= ~met_before
+        preferred = allowed
+        if self.exclude_same_church:
+            preferred = allowed & ~MatchingRules._same(
+                [u.church_id for u in males], [u.church_id for u in females]
+            )
+        same_denomination = (
+            MatchingRules._same([u.denomination_id for u in males], [u.denomination_id for u in females])
+            if self.prefer_same_denomination
+            else None
+        )
+
+        tiers = []
+        for max_age_gap in self.age_tiers:
+            within_gap = preferred & (age_diff <= max_age_gap)
+            if same_denomination is not None:
+                tiers.append(within_gap & same_denomination)
+            tiers.append(within_gap)
+        if self.exclude_same_church:
+            tiers.append(allowed & (age_diff <= self.age_tiers[-1]))
+        return np.stack(tiers)
+
+    @staticmethod
+    def _same(male_values: List[Optional[int]], female_values: List[Optional[int]]) -> np.ndarray:
+        """males x females mask of pairs sharing a (non-null) value."""
+        male_array = np.array([v if v is not None else -1 for v in male_values], dtype=np.int64)
+        female_array = np.array([v if v is not None else -1 for v in female_values], dtype=np.int64)
+        return (
+            (male_array[:, None] == female_array[None, :])
+            & (male_array[:, None] != -1)
+            & (female_array[None, :] != -1)
+        )
@@ -0,0 +1,260 @@
+import logging
+import math
+import os
+from concurrent.futures import as_completed
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from app.services.matching.models import Attendee, Pairing
+from app.services.matching.matcher import SpeedDateMatcher
+from app.services.matching.compatibility import CompatibilityMatrix
+from app.services.matching.history import PairHistory
+from app.services.matching.pool import process_pool
+from app.services.matching.portfolio import ROUND_BUILDERS
+from app.services.matching.rules import MatchingRules
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ShardedScheduler:
+    """
+    Schedules very large events band by band. Attendees are split into
+    contiguous age bands, each band gets its own range of tables and is
+    scheduled independently in a process pool, so compatibility and seating
+    work on band-sized blocks instead of the whole males x females matrix.
+
+    Bands don't share attendees, so they can never double-book anyone. The
+    age rules still let neighbouring bands overlap, so after the bands are
+    merged a reconciliation pass seats, round by round, whoever the bands
+    left standing (mostly people at band edges or on a band's larger
+    gender) with compatible partners from any band, at the tables the bands
+    didn't use.
+
+    on_round can't follow rounds here, since every band seats all of its
+    rounds at once. It is called as bands finish instead, with the share of
+    bands done scaled to num_rounds, and once more with the last round after
+    reconciliation, so progress only moves forward.
+    """
+
+    # Target number of attendees per band
+    BAND_SIZE = 500
+
+    @staticmethod
+    def run(
+        males: List[Attendee],
+        females: List[Attendee],
+        num_tables: int,
+        num_rounds: int,
+        builder: str = "greedy",
+        max_workers: Optional[int] = None,
+        rules: Optional[MatchingRules] = None,
+        pair_history: Optional[PairHistory] = None,
+        on_round: Optional[Callable[[int, int], None]] = None,
+        num_bands: Optional[int] = None,
+    ) -> List[Pairing]:
+        rules = rules or MatchingRules()
+        num_bands = num_bands or max(1, math.ceil((len(males) + len(females)) / ShardedScheduler.BAND_SIZE))
+        bands = ShardedScheduler.bands(males + females, num_bands)
+        band_tables = ShardedScheduler.allocate_tables(bands, num_tables)
+        logger.info(
+            "Sharded scheduling: %d bands, tables per band %s of %d",
+            len(bands), band_tables, num_tables,
+        )
+
+        jobs = []
+        first_table = 1
+        for band, tables in zip(bands, band_tables):
+            if tables > 0:
+                band_males = [attendee for attendee in band if attendee.is_male]
+                band_females = [attendee for attendee in band if not attendee.is_male]
+                jobs.append((first_table, (builder, band_males, band_females, tables, num_rounds, rules, pair_history)))
+            first_table += tables
+
+        if len(jobs) == 1:
+            results = [ShardedScheduler.run_band(*jobs[0][1])]
+        else:
+            max_workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+            results = [None] * len(jobs)
+            with process_pool(max_workers) as executor:
+                futures = {
+                    executor.submit(ShardedScheduler.run_band, *args): index
+                    for index, (_, args) in enumerate(jobs)
+                }
+                tables_done = 0
+                for done, future in enumerate(as_completed(futures), start=1):
+                    index = futures[future]
+                    results[index] = future.result()
+                    tables_done += jobs[index][1][3]
+                    # the last band's report waits for reconciliation below
+                    if on_round and done < len(jobs) and num_rounds * done // len(jobs) > 0:
+                        on_round(num_rounds * done // len(jobs), tables_done)
+
+        pairings = [
+            pairing._replace(table_number=pairing.table_number + first_table - 1)
+            for (first_table, _), band_pairings in zip(jobs, results)
+            for pairing in band_pairings
+        ]
+        pairings = ShardedScheduler.reconcile(
+            pairings, males, females, num_tables, num_rounds, rules, pair_history
+        )
+        if on_round and num_rounds > 0:
+            on_round(num_rounds, sum(1 for pairing in pairings if pairing.round_number == num_rounds))
+        return pairings
+
+    @staticmethod
+    def run_band(
+        builder: str,
+        males: List[Attendee],
+        females: List[Attendee],
+        num_tables: int,
+        num_rounds: int,
+        rules: MatchingRules,
+        pair_history: Optional[PairHistory],
+    ) -> List[Pairing]:
+        """Schedules one band at tables 1..num_tables."""
+        compatible_dates, id_to_user = CompatibilityMatrix.find_all_potential_dates(
+            males, females, num_tables, num_rounds, rules, pair_history
+        )
+        return ROUND_BUILDERS[builder](
+            compatible_dates, id_to_user, num_tables, num_rounds, pair_history=pair_history
+        )
+
+    @staticmethod
+    def bands(attendees: List[Attendee], num_bands: int) -> List[List[Attendee]]:
+        """
+        Splits attendees, youngest first, into num_bands groups of about equal
+        size. Cuts only fall between ages, so everyone of one age shares a band.
+        """
+        ordered = sorted(attendees, key=lambda attendee: (attendee.age, attendee.id))
+        bands = []
+        start = 0
+        for band in range(1, num_bands + 1):
+            end = max(start, round(len(ordered) * band / num_bands))
+            while 0 < end < len(ordered) and ordered[end].age == ordered[end - 1].age:
+                end += 1
+            if end > start:
+                bands.append(ordered[start:end])
+            start = end
+        return bands
+
+    @staticmethod
+    def allocate_tables(bands: List[List[Attendee]], num_tables: int) -> List[int]:
+        """
+        Tables per band: as many as its smaller gender can fill, scaled down
+        proportionally (largest remainders first) when that exceeds num_tables.
+        """
+        capacity = [
+            min(sum(1 for a in band if a.is_male), sum(1 for a in band if not a.is_male))
+            for band in bands
+        ]
+        total = sum(capacity)
+        if total <= num_tables:
+            return capacity
+        shares = [num_tables * c / total for c in capacity]
+        tables = [int(share) for share in shares]
+        by_remainder = sorted(range(len(bands)), key=lambda b: (tables[b] - shares[b], b))
+        for b in by_remainder[: num_tables - sum(tables)]:
+            tables[b] += 1
+        return tables
+
+    @staticmethod
+    def reconcile(
+        pairings: List[Pairing],
+        males: List[Attendee],
+        females: List[Attendee],
+        num_tables: int,
+        num_rounds: int,
+        rules: MatchingRules,
+        pair_history: Optional[PairHistory],
+        first_round: int = 1,
+    ) -> List[Pairing]:
+        """
+        Adds dates between attendees the bands left unseated in a round, at
+        the round's free tables. Pairs are taken fewest dates first, then
+        strictest rule tier, then smallest age gap; pairs who already meet in
+        the schedule are skipped and past pairs rank last, as in the builders.
+
+        Rounds before first_round are left alone and only count towards who
+        has met and how many dates each attendee has; the result holds the
+        rounds from first_round on. repair_schedule uses this to re-seat the
+        rest of a running event around the pairs it keeps.
+        """
+        # male id -> ids of the females he meets somewhere in the schedule
+        met: Dict[int, Set[int]] = {}
+        num_dates: Dict[int, int] = {attendee.id: 0 for attendee in males + females}
+        by_round: Dict[int, List[Pairing]] = {}
+        for pairing in pairings:
+            met.setdefault(pairing.male_id, set()).add(pairing.female_id)
+            # earlier rounds can include people who have since left
+            num_dates[pairing.male_id] = num_dates.get(pairing.male_id, 0) + 1
+            num_dates[pairing.female_id] = num_dates.get(pairing.female_id, 0) + 1
+            by_round.setdefault(pairing.round_number, []).append(pairing)
+
+        result: List[Pairing] = []
+        for round_number in range(first_round, num_rounds + 1):
+            round_pairings = by_round.get(round_number, [])
+            seated = {p.male_id for p in round_pairings} | {p.female_id for p in round_pairings}
+            used_tables = {p.table_number for p in round_pairings}
+            free_tables = [t for t in range(1, num_tables + 1) if t not in used_tables]
+            open_males = [m for m in males if m.id not in seated]
+            open_females = [f for f in females if f.id not in seated]
+
+            added = []
+            if free_tables and open_males and open_females:
+                added = ShardedScheduler._pair_open_attendees(
+                    open_males, open_females, len(free_tables), met, num_dates, rules, pair_history
+                )
+            for (male_id, female_id), table_number in zip(added, free_tables):
+                met.setdefault(male_id, set()).add(female_id)
+                num_dates[male_id] += 1
+                num_dates[female_id] += 1
+                round_pairings.append(Pairing(male_id, female_id, table_number, round_number))
+
+            if added:
+                logger.info("Round %d: reconciliation seated %d more pairs", round_number, len(added))
+            result.extend(round_pairings)
+        return result
+
+    @staticmethod
+    def _pair_open_attendees(
+        males: List[Attendee],
+        females: List[Attendee],
+        max_pairs: int,
+        met: Dict[int, Set[int]],
+        num_dates: Dict[int, int],
+        rules: MatchingRules,
+        pair_history: Optional[PairHistory],
+    ) -> List[Tuple[int, int]]:
+        met_before = pair_history.mask(males, females) if pair_history is not None else None
+        tiers = rules.compile(males, females, met_before)
+        allowed = tiers.any(axis=0)
+        female_index = {female.id: j for j, female in enumerate(females)}
+        for i, male in enumerate(males):
+            for female_id in met.get(male.id, ()):
+                if female_id in female_index:
+                    allowed[i, female_index[female_id]] = False
+        rows, cols = np.nonzero(allowed)
+        if not len(rows):
+            return []
+
+        male_ages = np.array([m.age for m in males])
+        female_ages = np.array([f.age for f in females])
+        male_dates = np.array([num_dates[m.id] for m in males])
+        female_dates = np.array([num_dates[f.id] for f in females])
+        cost = np.abs(male_ages[rows] - female_ages[cols])
+        if met_before is not None:
+            cost = cost + SpeedDateMatcher.PAST_PAIR_PENALTY * met_before[rows, cols]
+        # lexsort's last key is the primary one
+        order = np.lexsort((cost, tiers.argmax(axis=0)[rows, cols], male_dates[rows] + female_dates[cols]))
+
+        pairs = []
+        taken_males, taken_females = set(), set()
+        for k in order:
+            i, j = rows[k], cols[k]
+            if i in taken_males or j in taken_females:
+                continue
+            taken_males.add(i)
+            taken_females.add(j)
+            pairs.append((males[i].id, females[j].id))
+            if len(pairs) >= max_pairs:
+                break
+        return pairs
@@ -0,0 +1,42 @@
+from collections import deque
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+class ScheduleTrace:
+    """
+    Fixed-size ring buffer of scheduling decisions. Each decision is a plain
+    tuple (kind, *fields) appended as-is; nothing is formatted until the
+    trace is read. Round builders take an optional trace and only touch it
+    behind an `if trace is not None` check, so tracing costs nothing when off.
+    """
+
+    CAPACITY = 20000
+
+    # kind -> names of the fields that follow it in a recorded tuple
+    FIELDS = {
+        "start": ("builder", "attendees", "num_tables", "num_rounds"),
+        "seat": ("round", "table", "male_id", "female_id", "reused_table"),
+        "no_partner": ("round", "attendee_id"),
+        "round_end": ("round", "tables_filled"),
+        "cache_hit": ("dates",),
+    }
+
+    def __init__(self, capacity: int = CAPACITY):
+        self._decisions: deque = deque(maxlen=capacity)
+        # bound method, so hot loops pay for a single call per decision
+        self.record = self._decisions.append
+
+    def __len__(self) -> int:
+        return len(self._decisions)
+
+    def decisions(self) -> List[Tuple]:
+        return list(self._decisions)
+
+    @staticmethod
+    def describe(decisions: Iterable[Tuple]) -> List[Dict[str, Any]]:
+        """Decisions as dicts with named fields, as read back from the database."""
+        return [
+            {"kind": kind, **dict(zip(ScheduleTrace.FIELDS[kind], fields))}
+            for kind, *fields in decisions
+        ]
+
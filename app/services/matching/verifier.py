@@ -0,0 +1,99 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+from app.services.matching.history import PairHistory
+from app.services.matching.models import Attendee, Pairing
+from app.services.matching.rules import MatchingRules
+import numpy as np
+
+
+class ScheduleReport(NamedTuple):
+    num_dates: int
+    # extra seatings of an attendee in a round they already have a date in
+    double_booked: int
+    # extra dates at a table that is already used in that round
+    shared_tables: int
+    # table numbers outside 1..num_tables
+    invalid_tables: int
+    # extra dates between a pair that has already met in this schedule
+    repeat_pairs: int
+    # dates the matching rules don't allow, or with someone who isn't an attendee
+    incompatible_pairs: int
+
+    def ok(self) -> bool:
+        return not any(self[1:])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**self._asdict(), "ok": self.ok()}
+
+
+class ScheduleVerifier:
+    """
+    Checks a schedule's invariants on a (dates x 4) int64 array of
+    (male_id, female_id, table_number, round_number) rows. Every check is a
+    vectorized uniqueness or membership test over packed int64 keys, so
+    verifying costs about as much as sorting the schedule a few times.
+    """
+
+    @staticmethod
+    def verify(
+        pairings: Sequence[Pairing],
+        num_tables: int,
+        males: Optional[List[Attendee]] = None,
+        females: Optional[List[Attendee]] = None,
+        rules: Optional[MatchingRules] = None,
+        pair_history: Optional[PairHistory] = None,
+    ) -> ScheduleReport:
+        """
+        pairings may be any (male_id, female_id, table_number, round_number)
+        tuples. Compatibility is only checked when males and females are
+        given; a pair passes if the loosest tier of rules allows it.
+        """
+        schedule = np.array(pairings, dtype=np.int64).reshape(-1, 4)
+        male_ids, female_ids, tables, rounds = schedule.T
+
+        seated = np.concatenate([(rounds << 32) | male_ids, (rounds << 32) | female_ids])
+        incompatible = 0
+        if males is not None and females is not None:
+            incompatible = ScheduleVerifier._count_incompatible(
+                male_ids, female_ids, males, females, rules or MatchingRules(), pair_history
+            )
+
+        return ScheduleReport(
+            num_dates=len(schedule),
+            double_booked=ScheduleVerifier._count_duplicates(seated),
+            shared_tables=ScheduleVerifier._count_duplicates((rounds << 32) | tables),
+            invalid_tables=int(np.count_nonzero((tables < 1) | (tables > num_tables))),
+            repeat_pairs=ScheduleVerifier._count_duplicates((male_ids << 32) | female_ids),
+            incompatible_pairs=incompatible,
+        )
+
+    @staticmethod
+    def _count_duplicates(keys: np.ndarray) -> int:
+        """keys packs two ids per int64 as (high << 32) | low."""
+        return len(keys) - len(np.unique(keys))
+
+    @staticmethod
+    def _count_incompatible(
+        male_ids: np.ndarray,
+        female_ids: np.ndarray,
+        males: List[Attendee],
+        females: List[Attendee],
+        rules: MatchingRules,
+        pair_history: Optional[PairHistory],
+    ) -> int:
+        if not len(male_ids):
+            return 0
+        met_before = pair_history.mask(males, females) if pair_history is not None else None
+        allowed = rules.compile(males, females, met_before)[-1]
+
+        male_order = np.argsort([u.id for u in males])
+        female_order = np.argsort([u.id for u in females])
+        sorted_male_ids = np.array([u.id for u in males], dtype=np.int64)[male_order]
+        sorted_female_ids = np.array([u.id for u in females], dtype=np.int64)[female_order]
+        if not len(sorted_male_ids) or not len(sorted_female_ids):
+            return len(male_ids)
+
+        male_pos = np.minimum(np.searchsorted(sorted_male_ids, male_ids), len(sorted_male_ids) - 1)
+        female_pos = np.minimum(np.searchsorted(sorted_female_ids, female_ids), len(sorted_female_ids) - 1)
+        known = (sorted_male_ids[male_pos] == male_ids) & (sorted_female_ids[female_pos] == female_ids)
+        ok = known & allowed[male_order[male_pos], female_order[female_pos]]
+        return int(np.count_nonzero(~ok))
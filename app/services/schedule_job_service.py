@@ -0,0 +1,138 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional, Tuple
+from flask import current_app
+from app.extensions import db
+from app.models.enums import EventStatus, ScheduleJobStatus
+from app.models.event import Event
+from app.models.schedule_job import ScheduleJob
+from app.services.speed_date_service import SpeedDateService
+
+
+class ScheduleJobService:
+    # Background workers for schedule generation. Job state lives in the
+    # schedule_jobs table so any API worker can answer status polls.
+    _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="schedule-job")
+
+    # A pending/running job that hasn't reported progress for this long is
+    # assumed lost (e.g. the worker restarted) and no longer blocks new runs.
+    STALE_AFTER = timedelta(minutes=10)
+
+    @staticmethod
+    def find_active_job(event_id: int) -> Optional[ScheduleJob]:
+        return (
+            ScheduleJob.query.filter(
+                ScheduleJob.event_id == event_id,
+                ScheduleJob.status.in_(
+                    [ScheduleJobStatus.PENDING.value, ScheduleJobStatus.RUNNING.value]
+                ),
+                ScheduleJob.updated_at
+                > datetime.now(timezone.utc) - ScheduleJobService.STALE_AFTER,
+            )
+            .order_by(ScheduleJob.id.desc())
+            .first()
+        )
+
+    @staticmethod
+    def get_job(event_id: int, job_id: int) -> Optional[ScheduleJob]:
+        return ScheduleJob.query.filter_by(id=job_id, event_id=event_id).first()
+
+    @staticmethod
+    def submit(
+        event_id: int,
+        num_tables: int,
+        num_rounds: int,
+        strategy: str,
+        time_budget_ms: int,
+        on_success: Callable[[int, int, int], None],
+    ) -> Tuple[ScheduleJob, bool]:
+        """
+        Records a pending job and starts generating the schedule in the
+        background, unless the event already has an active job. Returns
+        (job, True) for the new job or (active job, False).
+
+        The check and the insert run under a lock on the event's row, so two
+        concurrent requests can't both start a job. on_success(event_id,
+        num_rounds, num_tables) runs inside the worker's app context once the
+        schedule has been saved, if the event is still open for registration.
+        """
+        db.session.execute(
+            db.select(Event.id).where(Event.id == event_id).with_for_update()
+        )
+        active_job = ScheduleJobService.find_active_job(event_id)
+        if active_job:
+            db.session.commit()
+            return active_job, False
+
+        job = ScheduleJob(
+            event_id=event_id,
+            status=ScheduleJobStatus.PENDING.value,
+            num_tables_requested=num_tables,
+            num_rounds_requested=num_rounds,
+            rounds_filled=0,
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        ScheduleJobService._executor.submit(
+            ScheduleJobService._run,
+            current_app._get_current_object(),
+            job.id,
+            strategy,
+            time_budget_ms,
+            on_success,
+        )
+        return job, True
+
+    @staticmethod
+    def _run(app, job_id: int, strategy: str, time_budget_ms: int, on_success):
+        with app.app_context():
+            job = db.session.get(ScheduleJob, job_id)
+            try:
+                job.status = ScheduleJobStatus.RUNNING.value
+                job.started_at = datetime.now(timezone.utc)
+                db.session.commit()
+
+                def record_progress(round_number, tables_filled):
+                    ScheduleJob.query.filter_by(id=job_id).update(
+                        {"rounds_filled": round_number}
+                    )
+                    db.session.commit()
+
+                num_rounds, num_tables = SpeedDateService.generate_schedule(
+                    job.event_id,
+                    job.num_tables_requested,
+                    job.num_rounds_requested,
+                    strategy,
+                    time_budget_ms,
+                    record_progress,
+                )
+
+                # The event may have been cancelled or started while the job
+                # ran; re-read it under a lock held until on_success commits.
+                event = db.session.get(
+                    Event, job.event_id, populate_existing=True, with_for_update=True
+                ) if num_rounds > 0 else None
+                if event is not None and event.status == EventStatus.REGISTRATION_OPEN.value:
+                    on_success(job.event_id, num_rounds, num_tables)
+                    job.status = ScheduleJobStatus.SUCCEEDED.value
+                    job.num_rounds = num_rounds
+                    job.num_tables = num_tables
+                elif num_rounds > 0:
+                    job.status = ScheduleJobStatus.FAILED.value
+                    job.error = "Event is no longer open for registration, so it was not started."
+                else:
+                    job.status = ScheduleJobStatus.FAILED.value
+                    job.error = "Event schedule could not be generated."
+                job.finished_at = datetime.now(timezone.utc)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                app.logger.error(
+                    f"Schedule job {job_id} failed: {str(e)}", exc_info=True
+                )
+                job = db.session.get(ScheduleJob, job_id)
+                job.status = ScheduleJobStatus.FAILED.value
+                job.error = str(e)
+                job.finished_at = datetime.now(timezone.utc)
+                db.session.commit()
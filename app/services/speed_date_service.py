@@ -1,29 +1,93 @@
+from app.models.event import Event
 from app.models.event_speed_date import EventSpeedDate
 from app.models.user import User
 from app.models.event_attendee import EventAttendee
 from app.models.enums import Gender, RegistrationStatus
-from app.services.matching.matcher import SpeedDateMatcher
+from app.services.matching.compatibility import CompatibilityMatrix
+from app.services.matching.optimizer import ScheduleOptimizer
+from app.services.matching.portfolio import SchedulePortfolio, ROUND_BUILDERS
+from app.services.matching.rotation import RotationTemplate
+from app.services.matching.sharding import ShardedScheduler
+from app.services.matching.rules import MatchingRules
+from app.services.matching.history import PairHistory
+from app.services.matching.models import Attendee, Pairing
+from app.services.matching.cache import ScheduleCache
+from app.services.matching.tracing import ScheduleTrace
+from app.services.matching.verifier import ScheduleReport, ScheduleVerifier
+from app.services.matching.capacity import CapacityAdvisor, CapacityReport
+from app.repositories.event_speed_date_repository import EventSpeedDateRepository
+from app.repositories.event_schedule_snapshot_repository import EventScheduleSnapshotRepository
+from app.repositories.event_schedule_trace_repository import EventScheduleTraceRepository
 from app.extensions import db
 from flask import current_app
-from typing import List, Dict, Any, Tuple
+from collections import Counter
+from typing import Callable, Iterable, List, Dict, Any, Optional, Tuple
 
 
 class SpeedDateService:
+    # Values accepted by generate_schedule's `strategy` argument: a single round
+    # builder, "portfolio" to run all of them in parallel and keep the best, or
+    # "sharded" to schedule age bands of very large events in parallel.
+    STRATEGIES = (*ROUND_BUILDERS, "portfolio", "sharded")
+    # Strategies that can rebuild part of a schedule in repair_schedule.
+    REPAIR_STRATEGIES = tuple(ROUND_BUILDERS)
+    # Longest optimizer budget for a schedule job, and for a request that
+    # generates in the foreground, which must finish well inside the
+    # worker's request timeout (gunicorn's default is 30s).
+    MAX_TIME_BUDGET_MS = 20000
+    MAX_SYNC_TIME_BUDGET_MS = 5000
+
     @staticmethod
-    def get_checked_in_attendees(event_id: int) -> List[User]:
-        return (
+    def get_checked_in_attendees(event_id: int, user_ids: Optional[Iterable[int]] = None) -> List[User]:
+        query = (
             db.session.query(User)
             .join(EventAttendee, User.id == EventAttendee.user_id)
             .filter(
                 EventAttendee.event_id == event_id,
                 EventAttendee.status == RegistrationStatus.CHECKED_IN,
             )
-            .all()
         )
+        if user_ids is not None:
+            query = query.filter(User.id.in_(list(user_ids)))
+        return query.all()
+
+    @staticmethod
+    def to_attendee(user: User) -> Attendee:
+        return Attendee(
+            id=user.id,
+            is_male=user.gender == Gender.MALE,
+            age=user.calculate_age(),
+            church_id=user.church_id,
+            denomination_id=user.denomination_id,
+        )
+
+    @staticmethod
+    def load_matching_rules(
+        event_id: int, attendees: List[Attendee]
+    ) -> Tuple[MatchingRules, Optional[PairHistory]]:
+        """
+        The event's matching rules, plus the history of attendees who met at
+        other events when the rules avoid or penalize repeat pairs.
+        """
+        event = db.session.get(Event, event_id)
+        rules = MatchingRules.from_dict(event.matching_rules if event else None)
+        pair_history = None
+        if rules.avoid_past_pairs or rules.prefer_new_pairs:
+            pair_history = PairHistory.from_pairs(
+                EventSpeedDateRepository.find_past_pairs(
+                    [attendee.id for attendee in attendees], event_id
+                )
+            )
+        return rules, pair_history
 
     @staticmethod
     def generate_schedule(
-        event_id: int, num_tables: int, num_rounds: int
+        event_id: int,
+        num_tables: int,
+        num_rounds: int,
+        strategy: str = "greedy",
+        time_budget_ms: int = 0,
+        on_round: Optional[Callable[[int, int], None]] = None,
     ) -> Tuple[int, int]:
         """
         Generate speed dating schedule for an event
@@ -32,23 +96,29 @@ class SpeedDateService:
             event_id: ID of the event
             num_tables: Number of tables available
             num_rounds: Number of rounds to schedule
+            strategy: One of STRATEGIES
+            time_budget_ms: If positive, how long ScheduleOptimizer may spend
+                improving the generated schedule
+            on_round: Called with (round_number, tables_filled) as each round
+                is seated
 
         Returns:
             Tuple[int, int]: num_rounds, num_tables
         """
         try:
-            EventSpeedDate.query.filter_by(event_id=event_id).delete()
-            db.session.commit()
-
             attendees = SpeedDateService.get_checked_in_attendees(event_id)
             if not attendees or len(attendees) < 2:
                 current_app.logger.warning(
                     f"Not enough attendees checked in for event {event_id} to generate schedule"
                 )
+                SpeedDateService.write_schedule(
+                    event_id, lambda: EventSpeedDateRepository.replace_for_event(event_id, [], commit=False)
+                )
                 return (-1, -1)
 
-            males = [user for user in attendees if user.gender == Gender.MALE]
-            females = [user for user in attendees if user.gender == Gender.FEMALE]
+            attendees = [SpeedDateService.to_attendee(user) for user in attendees]
+            males = [attendee for attendee in attendees if attendee.is_male]
+            females = [attendee for attendee in attendees if not attendee.is_male]
             num_tables_adjusted = (
                 min(len(males), len(females))
                 if num_tables > min(len(males), len(females))
@@ -59,31 +129,72 @@ class SpeedDateService:
                 current_app.logger.warning(
                     f"Need at least one person of each gender to generate schedule for event {event_id}"
                 )
+                SpeedDateService.write_schedule(
+                    event_id, lambda: EventSpeedDateRepository.replace_for_event(event_id, [], commit=False)
+                )
                 return (-1, -1)
 
             current_app.logger.info(
                 f"Generating schedule for event {event_id} with {len(males)} males and {len(females)} females"
             )
 
-            compatible_dates, id_to_user = SpeedDateMatcher.find_all_potential_dates(
-                males, females, num_tables_adjusted, num_rounds
-            )
-            speed_dates = SpeedDateMatcher.finalize_all_rounds(
-                compatible_dates,
-                id_to_user,
-                event_id,
+            rules, pair_history = SpeedDateService.load_matching_rules(event_id, attendees)
+            cache_key = ScheduleCache.key(
+                attendees,
                 num_tables_adjusted,
                 num_rounds,
+                strategy=strategy,
+                time_budget_ms=time_budget_ms,
+                rules=tuple(rules),
+                pair_history=pair_history.fingerprint() if pair_history is not None else None,
             )
+            event = db.session.get(Event, event_id)
+            trace = ScheduleTrace() if event is not None and event.trace_schedules else None
+            pairings = ScheduleCache.get(cache_key)
+            if pairings is not None:
+                current_app.logger.info(f"Reusing cached schedule for event {event_id}")
+                if trace is not None:
+                    trace.record(("cache_hit", len(pairings)))
+                    SpeedDateService.save_schedule_trace(event_id, trace)
+                if on_round:
+                    for round_number, tables_filled in sorted(
+                        Counter(pairing.round_number for pairing in pairings).items()
+                    ):
+                        on_round(round_number, tables_filled)
+            else:
+                pairings = SpeedDateService.build_pairings(
+                    event_id,
+                    males,
+                    females,
+                    num_tables_adjusted,
+                    num_rounds,
+                    strategy,
+                    time_budget_ms,
+                    on_round,
+                    rules,
+                    pair_history,
+                    trace,
+                )
+                if trace is not None:
+                    SpeedDateService.save_schedule_trace(event_id, trace)
+                report = ScheduleVerifier.verify(
+                    pairings, num_tables_adjusted, males, females, rules, pair_history
+                )
+                if not report.ok():
+                    current_app.logger.error(
+                        f"Generated schedule for event {event_id} failed verification, keeping the old one: {report}"
+                    )
+                    return (-1, -1)
+                ScheduleCache.put(cache_key, attendees, pairings)
 
-            for speed_date in speed_dates:
-                db.session.add(speed_date)
-
-            db.session.commit()
+            # The old schedule is only replaced once the new one is ready.
+            SpeedDateService.write_schedule(
+                event_id, lambda: EventSpeedDateRepository.replace_for_event(event_id, pairings, commit=False)
+            )
             current_app.logger.info(
-                f"Generated {len(speed_dates)} speed dates for event {event_id}"
+                f"Generated {len(pairings)} speed dates for event {event_id}"
             )
-            return max([esd.round_number for esd in speed_dates]), num_tables_adjusted
+            return max([pairing.round_number for pairing in pairings]), num_tables_adjusted
 
         except Exception as e:
             db.session.rollback()
@@ -92,6 +203,525 @@ class SpeedDateService:
             )
             return (-1, -1)
 
+    @staticmethod
+    def build_pairings(
+        event_id: int,
+        males: List[Attendee],
+        females: List[Attendee],
+        num_tables: int,
+        num_rounds: int,
+        strategy: str,
+        time_budget_ms: int,
+        on_round: Optional[Callable[[int, int], None]],
+        rules: MatchingRules,
+        pair_history: Optional[PairHistory],
+        trace: Optional[ScheduleTrace] = None,
+    ) -> List[Pairing]:
+        """
+        Runs the matcher for generate_schedule; see its arguments. Decisions
+        go to trace when one is given, except for portfolio and sharded runs,
+        whose builders run in worker processes.
+        """
+        if strategy == "sharded":
+            # Bands work out their own compatibility, so the full matrix is
+            # only built when the optimizer needs it.
+            pairings = ShardedScheduler.run(
+                males,
+                females,
+                num_tables,
+                num_rounds,
+                rules=rules,
+                pair_history=pair_history,
+                on_round=on_round,
+            )
+            current_app.logger.info(
+                f"Sharded schedule for event {event_id}: {len(pairings)} dates"
+            )
+            if time_budget_ms > 0:
+                compatible_dates, id_to_user = CompatibilityMatrix.find_all_potential_dates(
+                    males, females, num_tables, num_rounds, rules, pair_history
+                )
+                pairings = ScheduleOptimizer.optimize(
+                    pairings,
+                    ScheduleOptimizer.compatible_pairs(compatible_dates, id_to_user),
+                    id_to_user,
+                    num_tables,
+                    time_budget_ms,
+                    pair_history=pair_history,
+                )
+            return pairings
+
+        compatible_dates, id_to_user = CompatibilityMatrix.find_all_potential_dates(
+            males, females, num_tables, num_rounds, rules, pair_history
+        )
+        compatible_pairs = (
+            ScheduleOptimizer.compatible_pairs(compatible_dates, id_to_user)
+            if time_budget_ms > 0
+            else None
+        )
+        # Balanced events whose constraints barely bind get a closed-form
+        # rotation; everything else goes to the requested strategy. The
+        # rotation can't steer away from repeat pairs, so it is skipped
+        # when the rules prefer new pairs and some attendees have met.
+        pairings = (
+            RotationTemplate.build(
+                compatible_dates, id_to_user, num_tables, num_rounds, on_round, trace=trace
+            )
+            if not (rules.prefer_new_pairs and pair_history)
+            else None
+        )
+        if pairings is not None:
+            current_app.logger.info(
+                f"Using rotation template for event {event_id}"
+            )
+        elif strategy == "portfolio":
+            pairings, candidate, score = SchedulePortfolio.run(
+                males,
+                females,
+                num_tables,
+                num_rounds,
+                rules=rules,
+                pair_history=pair_history,
+                on_round=on_round,
+            )
+            current_app.logger.info(
+                f"Portfolio picked {candidate} for event {event_id}: {score}"
+            )
+        else:
+            pairings = ROUND_BUILDERS[strategy](
+                compatible_dates,
+                id_to_user,
+                num_tables,
+                num_rounds,
+                on_round,
+                pair_history=pair_history,
+                trace=trace,
+            )
+        if time_budget_ms > 0:
+            pairings = ScheduleOptimizer.optimize(
+                pairings,
+                compatible_pairs,
+                id_to_user,
+                num_tables,
+                time_budget_ms,
+                pair_history=pair_history,
+            )
+        return pairings
+
+    @staticmethod
+    def verify_schedule(event_id: int) -> ScheduleReport:
+        """
+        Checks an event's stored schedule: nobody double-booked, no table
+        shared in a round, no repeat pairs, and every pair allowed by the
+        event's matching rules for the attendees as they are now.
+        """
+        event = db.session.get(Event, event_id)
+        speed_dates = EventSpeedDateRepository.find_by_event_id(event_id)
+        pairings = [
+            Pairing(esd.male_id, esd.female_id, esd.table_number, esd.round_number)
+            for esd in speed_dates
+        ]
+        user_ids = {esd.male_id for esd in speed_dates} | {esd.female_id for esd in speed_dates}
+        attendees = [
+            SpeedDateService.to_attendee(user)
+            for user in (User.query.filter(User.id.in_(user_ids)).all() if user_ids else [])
+        ]
+        rules, pair_history = SpeedDateService.load_matching_rules(event_id, attendees)
+        # Without a recorded table count only table numbers below 1 are invalid
+        num_tables = (
+            event.num_tables
+            if event and event.num_tables
+            else max([0] + [pairing.table_number for pairing in pairings])
+        )
+        return ScheduleVerifier.verify(
+            pairings,
+            num_tables,
+            [attendee for attendee in attendees if attendee.is_male],
+            [attendee for attendee in attendees if not attendee.is_male],
+            rules,
+            pair_history,
+        )
+
+    @staticmethod
+    def analyze_capacity(event_id: int, num_tables: int, num_rounds: int) -> CapacityReport:
+        """
+        Estimates achievable rounds, usable tables and dates per attendee for
+        the checked-in attendees without generating a schedule.
+        """
+        attendees = [
+            SpeedDateService.to_attendee(user)
+            for user in SpeedDateService.get_checked_in_attendees(event_id)
+        ]
+        rules, pair_history = SpeedDateService.load_matching_rules(event_id, attendees)
+        return CapacityAdvisor.analyze(
+            [attendee for attendee in attendees if attendee.is_male],
+            [attendee for attendee in attendees if not attendee.is_male],
+            num_tables,
+            num_rounds,
+            rules,
+            pair_history,
+        )
+
+    @staticmethod
+    def get_round_assignments(event_id: int, user_id: int, round_numbers: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        The attendee's table and partner for each of round_numbers they have a
+        date in, keyed by round number. Only what a phone needs mid-event.
+        """
+        return {
+            round_number: {
+                "table": table_number,
+                "partner_id": partner_id,
+                "partner_name": f"{first_name} {last_name}",
+                "event_speed_date_id": speed_date_id,
+            }
+            for round_number, table_number, speed_date_id, partner_id, first_name, last_name in (
+                EventSpeedDateRepository.find_rounds_for_user(event_id, user_id, round_numbers)
+            )
+        }
+
+    @staticmethod
+    def build_all_schedules(
+        event_id: int, user_ids: Optional[Iterable[int]] = None
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        get_all_schedules without the error handling, for callers that need
+        failures to surface. With user_ids only those attendees' schedules
+        are built, from only the dates they are part of.
+        """
+        if user_ids is not None:
+            user_ids = list(user_ids)
+        # Get all checked-in attendees
+        attendees = SpeedDateService.get_checked_in_attendees(event_id, user_ids)
+        schedules = {attendee.id: [] for attendee in attendees}
+        is_male = {attendee.id: attendee.gender == Gender.MALE for attendee in attendees}
+
+        # One query for every date with both users and churches; each row
+        # goes to whichever side is a checked-in attendee, with the same
+        # entries get_schedule_for_attendee builds.
+        ages = {}
+        for date, male, female, male_church, female_church in (
+            EventSpeedDateRepository.find_with_attendees(event_id, user_ids)
+        ):
+            for user, user_church, partner, partner_church, user_is_male in (
+                (male, male_church, female, female_church, True),
+                (female, female_church, male, male_church, False),
+            ):
+                if is_male.get(user.id) is not user_is_male:
+                    continue
+                for person in (user, partner):
+                    if person.id not in ages:
+                        ages[person.id] = person.calculate_age()
+                user_interested = date.male_interested if user_is_male else date.female_interested
+                partner_interested = date.female_interested if user_is_male else date.male_interested
+                schedules[user.id].append(
+                    {
+                        "round": date.round_number,
+                        "table": date.table_number,
+                        "partner_id": partner.id,
+                        "partner_name": f"{partner.first_name} {partner.last_name}",
+                        "partner_age": ages[partner.id],
+                        "partner_church": partner_church if partner_church is not None else "Other",
+                        "partner_email": partner.email,
+                        "user_age": ages[user.id],
+                        "user_church": user_church if user_church is not None else "Other",
+                        "event_speed_date_id": date.id,
+                        "match": user_interested is True and partner_interested is True,
+                        "user_interested": user_interested
+                    }
+                )
+
+        return schedules
+
+    @staticmethod
+    def refresh_schedule_snapshots(event_id: int, user_ids: Optional[Iterable[int]] = None) -> None:
+        """
+        Rewrites the stored schedule snapshots for every checked-in attendee,
+        or only for user_ids. Call after anything that changes pairings or
+        interest. If the rewrite fails the event's snapshots are dropped, so
+        reads fall back to building schedules live instead of serving stale ones.
+        """
+        try:
+            SpeedDateService.save_schedule_snapshots(event_id, user_ids)
+        except Exception as e:
+            current_app.logger.error(
+                f"Error refreshing schedule snapshots for event {event_id}: {str(e)}"
+            )
+            try:
+                EventScheduleSnapshotRepository.delete_for_event(event_id)
+            except Exception as e:
+                current_app.logger.error(
+                    f"Error dropping schedule snapshots for event {event_id}: {str(e)}"
+                )
+
+    @staticmethod
+    def save_schedule_snapshots(event_id: int, user_ids: Optional[Iterable[int]] = None) -> None:
+        """
+        Builds and stores the snapshots refresh_schedule_snapshots describes,
+        committing whatever else the session has pending along with them;
+        failures are raised.
+        """
+        if user_ids is not None:
+            user_ids = list(user_ids)
+        schedules = SpeedDateService.build_all_schedules(event_id, user_ids)
+        EventScheduleSnapshotRepository.save(
+            event_id,
+            {user_id: current_app.json.dumps(schedule) for user_id, schedule in schedules.items()},
+            user_ids,
+        )
+
+    @staticmethod
+    def write_schedule(event_id: int, write: Callable[[], Any]) -> None:
+        """
+        Runs write, which stages changes to the event's speed dates without
+        committing, and commits them in one transaction with the rebuilt
+        snapshots, so readers never get snapshots of dates that are gone. If
+        write fails nothing is committed and the error is raised. If only
+        the snapshots can't be built, the changes are staged again and
+        committed with the event's snapshots dropped instead, so reads build
+        schedules live.
+        """
+        try:
+            write()
+        except Exception as e:
+            current_app.logger.error(
+                f"Error writing schedule for event {event_id}: {str(e)}"
+            )
+            raise e
+        try:
+            SpeedDateService.save_schedule_snapshots(event_id)
+        except Exception as e:
+            current_app.logger.error(
+                f"Error refreshing schedule snapshots for event {event_id}, dropping them: {str(e)}"
+            )
+            write()
+            EventScheduleSnapshotRepository.delete_for_event(event_id)
+
+    @staticmethod
+    def refresh_user_schedule_snapshots(user_id: int) -> None:
+        """
+        Call when a user's name, email, gender, birthday or church changes:
+        rewrites, in every event they are scheduled in, their own snapshot
+        and those of everyone they meet, which show those details.
+        """
+        for event_id, partner_ids in EventSpeedDateRepository.find_partners_by_event(user_id).items():
+            SpeedDateService.refresh_schedule_snapshots(event_id, partner_ids | {user_id})
+
+    @staticmethod
+    def get_schedule_snapshot(event_id: int, user_id: int) -> Optional[str]:
+        """The attendee's schedule as a serialized JSON list, or None without a snapshot."""
+        return EventScheduleSnapshotRepository.find(event_id, user_id)
+
+    @staticmethod
+    def get_all_schedule_snapshots(event_id: int) -> Optional[str]:
+        """
+        The schedules of everyone checked in now as one serialized JSON object
+        keyed by user id, in the shape of get_all_schedules, or None if the
+        event has no snapshots. Attendees who checked in after the schedule
+        was written have no dates yet and get an empty schedule, like in
+        get_all_schedules.
+        """
+        snapshots = EventScheduleSnapshotRepository.find_for_checked_in(event_id)
+        if all(schedule is None for _, schedule in snapshots):
+            return None
+        return "{" + ",".join(
+            f'"{user_id}":{schedule if schedule is not None else "[]"}' for user_id, schedule in snapshots
+        ) + "}"
+
+    @staticmethod
+    def set_schedule_tracing(event_id: int, enabled: bool) -> None:
+        """Turns decision tracing on or off for the event's next schedule runs."""
+        event = db.session.get(Event, event_id)
+        event.trace_schedules = enabled
+        db.session.commit()
+        current_app.logger.info(
+            f"Schedule tracing {'enabled' if enabled else 'disabled'} for event {event_id}"
+        )
+
+    @staticmethod
+    def get_schedule_trace(event_id: int) -> Dict[str, Any]:
+        """Whether tracing is on and the decisions from the latest traced run."""
+        event = db.session.get(Event, event_id)
+        decisions = EventScheduleTraceRepository.find(event_id)
+        return {
+            "enabled": bool(event is not None and event.trace_schedules),
+            "decisions": ScheduleTrace.describe(decisions) if decisions is not None else [],
+        }
+
+    @staticmethod
+    def save_schedule_trace(event_id: int, trace: ScheduleTrace) -> None:
+        """Stores the run's decisions as the event's latest trace; failures only log."""
+        try:
+            EventScheduleTraceRepository.save(event_id, trace.decisions())
+        except Exception as e:
+            current_app.logger.warning(
+                f"Could not save schedule trace for event {event_id}: {str(e)}"
+            )
+
+    @staticmethod
+    def invalidate_cached_schedules(user_id: int) -> None:
+        """Call when a user's gender, birthday or church changes."""
+        dropped = ScheduleCache.invalidate_user(user_id)
+        if dropped:
+            current_app.logger.info(
+                f"Dropped {dropped} cached schedules for user {user_id}"
+            )
+
+    @staticmethod
+    def repair_schedule(
+        event_id: int,
+        num_tables: int,
+        num_rounds: int,
+        frozen_through: int,
+        strategy: str = "greedy",
+    ) -> Dict[str, int]:
+        """
+        Re-seat the rounds after frozen_through for the currently checked-in
+        attendees, keeping every round up to frozen_through as played.
+
+        Upcoming dates between two attendees who are still checked in are
+        kept as they are, so most people's remaining schedule doesn't move.
+        No-shows' dates are dropped, and their partners and any late check-ins
+        are seated at the free tables of each remaining round (see
+        ShardedScheduler.reconcile). Only when none of the upcoming dates can
+        be kept are the remaining rounds rebuilt with the strategy's round
+        builder, carrying over each attendee's dates so far and last table.
+        Pairs who already met stay apart either way, and only rows that differ
+        from the stored schedule are written.
+
+        Args:
+            event_id: ID of the event
+            num_tables: Number of tables available
+            num_rounds: Total number of rounds in the event
+            frozen_through: Last round that must not change
+            strategy: One of REPAIR_STRATEGIES, for rebuilding the remaining
+                rounds when nothing can be kept
+
+        Returns:
+            Dict with the rows inserted/updated/deleted and the resulting
+            num_rounds and num_tables
+        """
+        existing = EventSpeedDateRepository.find_by_event_id(event_id)
+        frozen = [esd for esd in existing if esd.round_number <= frozen_through]
+        upcoming = {
+            (esd.round_number, esd.male_id, esd.female_id): esd
+            for esd in existing
+            if esd.round_number > frozen_through
+        }
+
+        attendees = [
+            SpeedDateService.to_attendee(user)
+            for user in SpeedDateService.get_checked_in_attendees(event_id)
+        ]
+        males = [attendee for attendee in attendees if attendee.is_male]
+        females = [attendee for attendee in attendees if not attendee.is_male]
+        num_tables_adjusted = min(num_tables, len(males), len(females))
+        remaining_rounds = num_rounds - frozen_through
+
+        checked_in = {attendee.id for attendee in attendees}
+        kept = [
+            Pairing(esd.male_id, esd.female_id, esd.table_number, esd.round_number)
+            for esd in upcoming.values()
+            if esd.male_id in checked_in
+            and esd.female_id in checked_in
+            and esd.round_number <= num_rounds
+            and esd.table_number <= num_tables
+        ]
+
+        pairings = []
+        if num_tables_adjusted > 0 and remaining_rounds > 0 and kept:
+            rules, pair_history = SpeedDateService.load_matching_rules(event_id, attendees)
+            pairings = ShardedScheduler.reconcile(
+                [
+                    Pairing(esd.male_id, esd.female_id, esd.table_number, esd.round_number)
+                    for esd in frozen
+                ]
+                + kept,
+                males,
+                females,
+                max(num_tables, num_tables_adjusted),
+                num_rounds,
+                rules,
+                pair_history,
+                first_round=frozen_through + 1,
+            )
+        elif num_tables_adjusted > 0 and remaining_rounds > 0:
+            met = {(esd.male_id, esd.female_id) for esd in frozen}
+            rounds_completed = {}
+            previous_tables = {}
+            for esd in frozen:
+                rounds_completed[esd.male_id] = rounds_completed.get(esd.male_id, 0) + 1
+                rounds_completed[esd.female_id] = rounds_completed.get(esd.female_id, 0) + 1
+                if esd.round_number == frozen_through:
+                    previous_tables[esd.male_id] = esd.table_number
+                    previous_tables[esd.female_id] = esd.table_number
+
+            rules, pair_history = SpeedDateService.load_matching_rules(event_id, attendees)
+            compatible_dates, id_to_user = CompatibilityMatrix.find_all_potential_dates(
+                males, females, num_tables_adjusted, remaining_rounds, rules, pair_history
+            )
+            for user_id, dates in compatible_dates.items():
+                if id_to_user[user_id].is_male:
+                    compatible_dates[user_id] = [date for date in dates if (user_id, date.id) not in met]
+                else:
+                    compatible_dates[user_id] = [date for date in dates if (date.id, user_id) not in met]
+
+            pairings = [
+                pairing._replace(round_number=pairing.round_number + frozen_through)
+                for pairing in ROUND_BUILDERS[strategy](
+                    compatible_dates,
+                    id_to_user,
+                    num_tables_adjusted,
+                    remaining_rounds,
+                    rounds_completed=rounds_completed,
+                    previous_tables=previous_tables,
+                    pair_history=pair_history,
+                )
+            ]
+
+        inserted = []
+        table_updates = {}
+        for pairing in pairings:
+            esd = upcoming.pop((pairing.round_number, pairing.male_id, pairing.female_id), None)
+            if esd is None:
+                inserted.append(pairing)
+            elif esd.table_number != pairing.table_number:
+                table_updates[esd.id] = pairing.table_number
+        deleted_ids = [esd.id for esd in upcoming.values()]
+
+        report = ScheduleVerifier.verify(
+            [
+                Pairing(esd.male_id, esd.female_id, esd.table_number, esd.round_number)
+                for esd in frozen
+            ]
+            + pairings,
+            max(num_tables, num_tables_adjusted),
+        )
+        if not report.ok():
+            raise ValueError(f"Repaired schedule failed verification: {report}")
+
+        SpeedDateService.write_schedule(
+            event_id,
+            lambda: EventSpeedDateRepository.apply_changes(
+                event_id, deleted_ids, table_updates, inserted, commit=False
+            ),
+        )
+        current_app.logger.info(
+            f"Repaired schedule for event {event_id} after round {frozen_through}: "
+            f"{len(inserted)} inserted, {len(table_updates)} updated, {len(deleted_ids)} deleted"
+        )
+        return {
+            "frozen_through": frozen_through,
+            "inserted": len(inserted),
+            "updated": len(table_updates),
+            "deleted": len(deleted_ids),
+            "num_rounds": max(
+                [esd.round_number for esd in frozen] + [pairing.round_number for pairing in pairings],
+                default=0,
+            ),
+            "num_tables": num_tables_adjusted,
+        }
+
     @staticmethod
     def get_schedule_for_attendee(event_id: int, user_id: int) -> List[Dict[str, Any]]:
         try:
@@ -176,18 +806,7 @@ class SpeedDateService:
             Dict mapping user_id to their schedule
         """
         try:
-            # Get all checked-in attendees
-            attendees = SpeedDateService.get_checked_in_attendees(event_id)
-
-            # Get schedule for each attendee
-            schedules = {}
-            for attendee in attendees:
-                schedule = SpeedDateService.get_schedule_for_attendee(
-                    event_id, attendee.id
-                )
-                schedules[attendee.id] = schedule
-
-            return schedules
+            return SpeedDateService.build_all_schedules(event_id)
 
         except Exception as e:
             current_app.logger.error(
@@ -0,0 +1,36 @@
+from typing import Any, Optional
+from flask import Response, request
+import hashlib
+
+
+def make_etag(*parts: Any) -> str:
+    """Opaque validator from whatever identifies a version of a resource (ids, timestamps, counts, bodies)."""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def not_modified(etag: str, cache_control: str = "private, no-cache") -> Optional[Response]:
+    """
+    An empty 304 if the request's If-None-Match already names this version,
+    else None. Check it before building the body, so unchanged resources
+    skip the queries and serialization behind it:
+
+        etag = make_etag(...)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        ...
+        return with_validators(jsonify(data), etag)
+    """
+    if request.if_none_match and request.if_none_match.contains_weak(etag):
+        return with_validators(Response(status=304), etag, cache_control)
+    return None
+
+
+def with_validators(response: Response, etag: str, cache_control: str = "private, no-cache") -> Response:
+    """
+    Sets the ETag and Cache-Control headers. no-cache lets clients keep the
+    body but makes them revalidate on every request, which costs a 304.
+    """
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = cache_control
+    return response
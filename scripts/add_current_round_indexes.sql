@@ -0,0 +1,9 @@
+-- Speeds up looking up where an attendee sits in the current round
+-- (EventSpeedDateRepository.find_rounds_for_user and the event timer lookup
+-- behind GET /events/<id>/schedule/current)
+CREATE INDEX IF NOT EXISTS ix_events_speed_dates_event_male_round
+    ON events_speed_dates (event_id, male_id, round_number);
+CREATE INDEX IF NOT EXISTS ix_events_speed_dates_event_female_round
+    ON events_speed_dates (event_id, female_id, round_number);
+CREATE INDEX IF NOT EXISTS ix_event_timers_event_id
+    ON event_timers (event_id);
@@ -0,0 +1,3 @@
+-- Per-event matching rules (see MatchingRules); NULL means the defaults
+ALTER TABLE events
+ADD COLUMN IF NOT EXISTS matching_rules JSON NULL;
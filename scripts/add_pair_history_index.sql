@@ -0,0 +1,4 @@
+-- Speeds up loading which attendees have met at earlier events
+-- (EventSpeedDateRepository.find_past_pairs filters on both columns)
+CREATE INDEX IF NOT EXISTS ix_events_speed_dates_male_female
+    ON events_speed_dates (male_id, female_id);
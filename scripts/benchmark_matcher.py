@@ -0,0 +1,256 @@
+import sys
+import os
+import argparse
+import itertools
+import json
+import logging
+import math
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.matching.models import Attendee
+from app.services.matching.matcher import SpeedDateMatcher
+from app.services.matching.compatibility import CompatibilityMatrix
+from app.services.matching.portfolio import ROUND_BUILDERS, SchedulePortfolio
+from app.services.matching.sharding import ShardedScheduler
+from app.services.matching.verifier import ScheduleVerifier
+
+
+def synthetic_attendees(num_attendees, num_churches=8, seed=0, male_share=0.5, min_age=22, max_age=40):
+    """Builds attendees aged min_age-max_age, with male_share of them male (spread evenly by id)."""
+    rng = random.Random(seed)
+    males, females = [], []
+    for user_id in range(1, num_attendees + 1):
+        attendee = Attendee(
+            id=user_id,
+            is_male=math.ceil(user_id * male_share) > math.ceil((user_id - 1) * male_share),
+            age=rng.randint(min_age, max_age),
+            church_id=rng.choice([None] + list(range(1, num_churches + 1))),
+        )
+        (males if attendee.is_male else females).append(attendee)
+    return males, females
+
+
+def run_builder(finalize_all_rounds, males, females, num_tables, num_rounds):
+    compatible_dates, id_to_user = CompatibilityMatrix.find_all_potential_dates(
+        males, females, num_tables, num_rounds
+    )
+    start = time.perf_counter()
+    speed_dates = finalize_all_rounds(compatible_dates, id_to_user, num_tables, num_rounds)
+    elapsed = time.perf_counter() - start
+
+    filled_per_round = {}
+    for speed_date in speed_dates:
+        filled_per_round[speed_date.round_number] = filled_per_round.get(speed_date.round_number, 0) + 1
+    return elapsed, len(speed_dates), sum(1 for filled in filled_per_round.values() if filled == num_tables)
+
+
+def benchmark_round_builders(sizes, num_rounds, repeats=5):
+    """
+    Best of `repeats` runs per builder, with each builder's time relative to the
+    greedy loop; a ratio above 1.00 means that builder is slower than greedy.
+    """
+    print(f"{'attendees':>9} {'builder':>9} {'seconds':>9} {'vs greedy':>10} {'dates':>7} {'full rounds':>12}")
+    for size in sizes:
+        males, females = synthetic_attendees(size)
+        num_tables = min(len(males), len(females))
+        results = {}
+        for _ in range(repeats):
+            for name, finalize_all_rounds in ROUND_BUILDERS.items():
+                elapsed, num_dates, full_rounds = run_builder(
+                    finalize_all_rounds, males, females, num_tables, num_rounds
+                )
+                best = results.get(name)
+                results[name] = (min(elapsed, best[0]) if best else elapsed, num_dates, full_rounds)
+        for name, (elapsed, num_dates, full_rounds) in results.items():
+            ratio = elapsed / results["greedy"][0]
+            print(f"{size:>9} {name:>9} {elapsed:>9.3f} {ratio:>9.2f}x {num_dates:>7} {full_rounds:>9}/{num_rounds}")
+
+
+def benchmark_scaling(sizes, num_rounds):
+    """Shows how the greedy scheduler's time grows with the number of attendees."""
+    print(f"{'attendees':>9} {'seconds':>9} {'per attendee (ms)':>18}")
+    for size in sizes:
+        males, females = synthetic_attendees(size)
+        num_tables = min(len(males), len(females))
+        elapsed, _, _ = run_builder(SpeedDateMatcher.finalize_all_rounds, males, females, num_tables, num_rounds)
+        print(f"{size:>9} {elapsed:>9.3f} {1000 * elapsed / size:>18.3f}")
+
+
+def benchmark_rounds(sizes, num_rounds):
+    """Times each round of the greedy scheduler, to check that later rounds don't slow down."""
+    print(f"{'attendees':>9} {'rounds':>7} {'seconds':>9} {'mean round (ms)':>16} {'slowest round (ms)':>19}")
+    for size in sizes:
+        males, females = synthetic_attendees(size)
+        num_tables = min(len(males), len(females))
+        compatible_dates, id_to_user = CompatibilityMatrix.find_all_potential_dates(
+            males, females, num_tables, num_rounds
+        )
+        round_times = []
+        last = start = time.perf_counter()
+
+        def on_round(round_number, tables_filled):
+            nonlocal last
+            now = time.perf_counter()
+            round_times.append(now - last)
+            last = now
+
+        SpeedDateMatcher.finalize_all_rounds(compatible_dates, id_to_user, num_tables, num_rounds, on_round)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{size:>9} {num_rounds:>7} {elapsed:>9.3f} {1000 * elapsed / num_rounds:>16.2f} "
+            f"{1000 * max(round_times):>19.2f}"
+        )
+
+
+def benchmark_sharding(sizes, num_rounds):
+    """Compares one greedy run over everyone with age-band sharded runs, compatibility included."""
+    print(f"{'attendees':>9} {'mode':>12} {'seconds':>9} {'dates':>7} {'full rounds':>12} {'valid':>6}")
+    for size in sizes:
+        males, females = synthetic_attendees(size)
+        num_tables = min(len(males), len(females))
+
+        def unsharded():
+            compatible_dates, id_to_user = CompatibilityMatrix.find_all_potential_dates(
+                males, females, num_tables, num_rounds
+            )
+            return SpeedDateMatcher.finalize_all_rounds(compatible_dates, id_to_user, num_tables, num_rounds)
+
+        modes = [("unsharded", unsharded)] + [
+            (f"{num_bands} bands", lambda num_bands=num_bands: ShardedScheduler.run(
+                males, females, num_tables, num_rounds, num_bands=num_bands
+            ))
+            for num_bands in (2, 4, 8)
+        ]
+        for mode, schedule in modes:
+            start = time.perf_counter()
+            pairings = schedule()
+            elapsed = time.perf_counter() - start
+            score = SchedulePortfolio.score(pairings, males + females, num_tables)
+            report = ScheduleVerifier.verify(pairings, num_tables, males, females)
+            print(
+                f"{size:>9} {mode:>12} {elapsed:>9.3f} {score.num_dates:>7} "
+                f"{score.full_rounds:>9}/{num_rounds} {str(report.ok()):>6}"
+            )
+
+
+# Population shapes covered by the suite benchmark
+GENDER_SPLITS = {"balanced": 0.5, "skewed": 0.65}
+AGE_SPREADS = {"tight": (26, 30), "wide": (21, 45)}
+CHURCH_COUNTS = {"few": 2, "many": 40}
+
+
+def measure(func, *args):
+    """Runs func twice: once timed, once under tracemalloc for peak memory."""
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def benchmark_suite(sizes, num_rounds, output=None):
+    """
+    Times compatibility and each round builder across the population grid and
+    records peak memory and schedule quality. Results are written as JSON to
+    output so runs from different commits can be compared.
+    """
+    results = []
+    print(
+        f"{'attendees':>9} {'genders':>8} {'ages':>5} {'churches':>8} {'builder':>9} "
+        f"{'compat s':>9} {'build s':>9} {'peak MB':>8} {'dates':>7} {'full rounds':>12} {'spread':>7}"
+    )
+    for size, (split, male_share), (spread, (min_age, max_age)), (churches, num_churches) in itertools.product(
+        sizes, GENDER_SPLITS.items(), AGE_SPREADS.items(), CHURCH_COUNTS.items()
+    ):
+        males, females = synthetic_attendees(
+            size, num_churches, male_share=male_share, min_age=min_age, max_age=max_age
+        )
+        num_tables = min(len(males), len(females))
+        (compatible_dates, id_to_user), compat_seconds, compat_peak = measure(
+            CompatibilityMatrix.find_all_potential_dates, males, females, num_tables, num_rounds
+        )
+        for name, finalize_all_rounds in ROUND_BUILDERS.items():
+            pairings, build_seconds, build_peak = measure(
+                finalize_all_rounds, compatible_dates, id_to_user, num_tables, num_rounds
+            )
+            score = SchedulePortfolio.score(pairings, males + females, num_tables)
+            report = ScheduleVerifier.verify(pairings, num_tables, males, females)
+            results.append({
+                "attendees": size,
+                "males": len(males),
+                "females": len(females),
+                "gender_split": split,
+                "age_spread": spread,
+                "churches": churches,
+                "builder": name,
+                "num_tables": num_tables,
+                "num_rounds": num_rounds,
+                "compatibility_seconds": round(compat_seconds, 6),
+                "compatibility_peak_bytes": compat_peak,
+                "build_seconds": round(build_seconds, 6),
+                "build_peak_bytes": build_peak,
+                "quality": score._asdict(),
+                "valid": report.ok(),
+            })
+            print(
+                f"{size:>9} {split:>8} {spread:>5} {churches:>8} {name:>9} {compat_seconds:>9.3f} "
+                f"{build_seconds:>9.3f} {max(compat_peak, build_peak) / 2**20:>8.1f} {score.num_dates:>7} "
+                f"{score.full_rounds:>9}/{num_rounds} {score.max_dates - score.min_dates:>7}"
+            )
+
+    if output:
+        with open(output, "w") as f:
+            json.dump({"environment": environment(), "num_rounds": num_rounds, "results": results}, f, indent=2)
+        print(f"\nWrote {len(results)} results to {output}")
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+    }
+
+
+# name -> (function, default sizes, default rounds)
+BENCHMARKS = {
+    "builders": (benchmark_round_builders, [100, 200, 400], 15),
+    "scaling": (benchmark_scaling, [50, 100, 250, 500, 1000], 15),
+    "rounds": (benchmark_rounds, [300], 30),
+    "sharding": (benchmark_sharding, [1000, 2000, 4000], 15),
+    "suite": (benchmark_suite, [20, 100, 500, 2000], 15),
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the speed date round builders")
+    parser.add_argument("benchmark", nargs="?", choices=BENCHMARKS, default="builders")
+    parser.add_argument("--sizes", type=int, nargs="+")
+    parser.add_argument("--rounds", type=int)
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON results file for the suite benchmark")
+    args = parser.parse_args()
+
+    logging.getLogger("app.services.matching").setLevel(logging.WARNING)
+    benchmark, default_sizes, default_rounds = BENCHMARKS[args.benchmark]
+    if benchmark is benchmark_suite:
+        benchmark_suite(args.sizes or default_sizes, args.rounds or default_rounds, args.output)
+    else:
+        benchmark(args.sizes or default_sizes, args.rounds or default_rounds)
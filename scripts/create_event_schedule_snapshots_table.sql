@@ -0,0 +1,23 @@
+-- Create the event_schedule_snapshots table if it doesn't already exist
+-- Each row holds one attendee's schedule for an event as pre-serialized
+-- JSON, rewritten when the schedule or anyone's interest changes, so the
+-- schedule endpoints don't rebuild it on every request.
+
+CREATE TABLE IF NOT EXISTS event_schedule_snapshots (
+    event_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    schedule TEXT NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (event_id, user_id),
+
+    CONSTRAINT fk_event
+        FOREIGN KEY(event_id)
+        REFERENCES events(id)
+        ON DELETE CASCADE,
+
+    CONSTRAINT fk_user
+        FOREIGN KEY(user_id)
+        REFERENCES users(id)
+        ON DELETE CASCADE
+);
@@ -0,0 +1,17 @@
+-- Per-event schedule decision tracing, kept in the database so every
+-- worker process sees the same setting and the same latest trace.
+
+ALTER TABLE events
+ADD COLUMN IF NOT EXISTS trace_schedules BOOLEAN NOT NULL DEFAULT FALSE;
+
+-- One row per event: the decisions of its latest traced schedule run
+CREATE TABLE IF NOT EXISTS event_schedule_traces (
+    event_id INTEGER PRIMARY KEY,
+    decisions JSON NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT fk_event
+        FOREIGN KEY(event_id)
+        REFERENCES events(id)
+        ON DELETE CASCADE
+);
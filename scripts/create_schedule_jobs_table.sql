@@ -0,0 +1,26 @@
+-- Create the schedule_jobs table if it doesn't already exist
+-- This table tracks background schedule generation runs so any API worker
+-- can report their progress.
+
+CREATE TABLE IF NOT EXISTS schedule_jobs (
+    id SERIAL PRIMARY KEY,
+    event_id INTEGER NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    num_tables_requested INTEGER NOT NULL,
+    num_rounds_requested INTEGER NOT NULL,
+    rounds_filled INTEGER NOT NULL DEFAULT 0,
+    num_rounds INTEGER NULL,
+    num_tables INTEGER NULL,
+    error TEXT NULL,
+    started_at TIMESTAMP WITH TIME ZONE NULL,
+    finished_at TIMESTAMP WITH TIME ZONE NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT fk_event
+        FOREIGN KEY(event_id)
+        REFERENCES events(id)
+        ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS ix_schedule_jobs_event_id ON schedule_jobs (event_id);